@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections import deque
+from typing import Callable, List, Sequence, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# (topics, encoded payload) -> number of local sockets it was queued for
+Deliver = Callable[[Sequence[str], str], int]
+
+
+class NotificationBus:
+    """
+    Carries WebSocket notifications to every API worker. Each worker delivers
+    to its own sockets via `deliver`; backends differ in how messages reach
+    the other workers. publish() never blocks and is safe from any thread.
+    """
+
+    name = "inprocess"
+
+    def __init__(self, deliver: Deliver):
+        self.deliver = deliver
+        self.origin = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def publish(self, topics: Sequence[str], text: str):
+        self.published += 1
+        self.deliver(topics, text)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "published": self.published, "received": self.received}
+
+
+class InProcessBus(NotificationBus):
+    """Single worker: deliver straight to the local ConnectionManager."""
+
+
+class _RelayBus(NotificationBus):
+    """Local delivery happens immediately; an outbox is relayed to other workers by a pump task."""
+
+    def __init__(self, deliver: Deliver):
+        super().__init__(deliver)
+        self._outbox: deque[Tuple[List[str], str]] = deque()
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def publish(self, topics: Sequence[str], text: str):
+        super().publish(topics, text)
+        self._outbox.append((list(topics), text))
+
+    def _drain_outbox(self) -> List[Tuple[List[str], str]]:
+        out = []
+        while self._outbox:
+            out.append(self._outbox.popleft())
+        return out
+
+    async def stop(self):
+        self._stopping = True
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+class SqliteBus(_RelayBus):
+    """
+    Broker-less multi-process bus for workers on one host: publishers append
+    to a shared SQLite table (WAL) and every worker tails it by rowid.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, deliver: Deliver, path: str, poll_interval_s: float = 0.02, retention_s: float = 60.0):
+        super().__init__(deliver)
+        self.path = os.path.abspath(path)
+        self.poll_interval_s = poll_interval_s
+        self.retention_s = retention_s
+        self._conn: sqlite3.Connection | None = None
+        self._last_id = 0
+        self._last_prune = 0.0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS notifications ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL,"
+            " topics TEXT NOT NULL, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn = conn
+        self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM notifications").fetchone()[0]
+
+    def _step(self) -> List[Tuple[List[str], str]]:
+        conn = self._conn
+        now = time.time()
+        batch = self._drain_outbox()
+        if batch:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO notifications (origin, topics, payload, created_at) VALUES (?, ?, ?, ?)",
+                    [(self.origin, json.dumps(topics), text, now) for topics, text in batch],
+                )
+
+        rows = conn.execute(
+            "SELECT id, origin, topics, payload FROM notifications WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        if rows:
+            self._last_id = rows[-1][0]
+
+        if now - self._last_prune > self.retention_s:
+            self._last_prune = now
+            conn.execute("DELETE FROM notifications WHERE created_at < ?", (now - self.retention_s,))
+
+        return [(json.loads(topics), text) for _, origin, topics, text in rows if origin != self.origin]
+
+    async def start(self):
+        await asyncio.to_thread(self._open)
+        self._tasks.append(asyncio.create_task(self._pump()))
+
+    async def _pump(self):
+        while not self._stopping:
+            try:
+                for topics, text in await asyncio.to_thread(self._step):
+                    self.received += 1
+                    self.deliver(topics, text)
+            except Exception:
+                logger.exception("sqlite notification bus step failed")
+            await asyncio.sleep(self.poll_interval_s)
+
+    async def stop(self):
+        await super().stop()
+        if self._conn is not None:
+            # flush anything published during shutdown
+            await asyncio.to_thread(self._step)
+            self._conn.close()
+            self._conn = None
+
+
+class RedisBus(_RelayBus):
+    """Redis (or any RESP-compatible server) pub/sub channel shared by all workers."""
+
+    name = "redis"
+
+    def __init__(self, deliver: Deliver, url: str, channel: str = "copmap:notifications"):
+        super().__init__(deliver)
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._wake: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def publish(self, topics: Sequence[str], text: str):
+        super().publish(topics, text)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def start(self):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("NOTIFY_BUS=redis requires the 'redis' package") from e
+
+        self._redis = aioredis.from_url(self.url)
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._tasks.append(asyncio.create_task(self._listen(pubsub)))
+        self._tasks.append(asyncio.create_task(self._pump()))
+
+    async def _pump(self):
+        while not self._stopping:
+            await self._wake.wait()
+            self._wake.clear()
+            for topics, text in self._drain_outbox():
+                msg = json.dumps({"o": self.origin, "t": topics, "p": text})
+                try:
+                    await self._redis.publish(self.channel, msg)
+                except Exception:
+                    logger.exception("redis publish failed")
+
+    async def _listen(self, pubsub):
+        async for msg in pubsub.listen():
+            if msg.get("type") != "message":
+                continue
+            data = json.loads(msg["data"])
+            if data["o"] == self.origin:
+                continue
+            self.received += 1
+            self.deliver(data["t"], data["p"])
+
+    async def stop(self):
+        await super().stop()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+def create_bus(kind: str, deliver: Deliver) -> NotificationBus:
+    kind = (kind or "inprocess").lower()
+    if kind == "inprocess":
+        return InProcessBus(deliver)
+    if kind == "sqlite":
+        path = settings.NOTIFY_BUS_PATH or os.path.join(settings.DATA_DIR, "notify_bus.db")
+        return SqliteBus(deliver, path, poll_interval_s=settings.NOTIFY_BUS_POLL_MS / 1000.0)
+    if kind == "redis":
+        return RedisBus(deliver, settings.REDIS_URL)
+    raise ValueError(f"Unknown NOTIFY_BUS backend: {kind}")
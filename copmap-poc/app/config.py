@@ -11,14 +11,109 @@ class Settings(BaseSettings):
 
     DATA_DIR: str = "./data"
     SQLITE_PATH: str = "./data/copmap.db"
+    # optional overrides, e.g. postgresql+psycopg://... / postgresql+asyncpg://...
+    DATABASE_URL: str = ""
+    ASYNC_DATABASE_URL: str = ""
+
+    # production: WAL + synchronous=NORMAL + mmap/cache tuning; default: sqlite defaults
+    SQLITE_PROFILE: str = "production"
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
 
     CHROMA_DIR: str = "./data/chroma"
     CHROMA_COLLECTION: str = "copmap_docs"
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_PATH: str = ""  # e.g. ./data/embedding_cache.db; empty keeps the cache in memory only
+    EMBED_BATCH_SIZE: int = 64
+    RAG_UPSERT_BATCH: int = 256
+    # chunking: sentence-aware windows measured in words (~1.3 model tokens each)
+    RAG_CHUNK_WORDS: int = 160
+    RAG_CHUNK_OVERLAP_WORDS: int = 32
+    RAG_QUERY_FANOUT: int = 4  # chunks fetched per requested document before merging
+    RAG_INDEX_PATH: str = ""  # BM25 index; default DATA_DIR/rag_index.db
+    RAG_QUERY_MODE: str = "hybrid"  # vector|lexical|hybrid (reciprocal rank fusion)
+    RAG_RRF_K: int = 60
+    RAG_QUERY_CACHE_SIZE: int = 1024  # 0 disables the result cache
+    RAG_QUERY_CACHE_TTL_S: float = 300.0
+    RAG_PREFILTER_EXACT_DOCS: int = 256  # filtered queries matching <= this many docs are scored exactly
+    UPLOAD_SPOOL_BYTES: int = 1024 * 1024  # uploads larger than this go to a temp file
+    UPLOAD_MAX_BYTES: int = 200 * 1024 * 1024
+    VIDEO_INGEST_BATCH: int = 256  # clips rendered/embedded per batch by the video ingester
+    RAG_WARMUP: bool = True  # load the embedder/collection in a background thread at startup
+
+    # embedding off the event loop; concurrent query embeddings within the window share one encode
+    EMBED_EXECUTOR: str = "thread"  # thread|process
+    EMBED_WORKERS: int = 1
+    EMBED_BATCH_WINDOW_MS: float = 5.0
+    EMBED_MAX_BATCH: int = 64
+
+    # officer spatial index (grid cell size in degrees, ~5.5 km at 0.05)
+    OFFICER_INDEX_CELL_DEG: float = 0.05
+    ASSIGN_MAX_KM: float = 5.0
+    # batch alerts: priority-weighted assignment with at most ASSIGN_CAPACITY open alerts per officer
+    ASSIGN_SOLVER: str = "hungarian"  # hungarian (scipy, greedy if missing) | greedy | nearest
+    ASSIGN_CAPACITY: int = 3
+    ASSIGN_CANDIDATES: int = 8  # nearest officers considered per alert
+    ASSIGN_LOAD_PENALTY_KM: float = 0.5  # extra km charged per open alert an officer already has
+    ALERT_BATCH_MAX: int = 1000
+    ALERT_METADATA_CACHE_SIZE: int = 4096  # decoded metadata_json LRU; 0 disables
+
+    # websocket fan-out: per-connection queue bound and overflow policy
+    WS_QUEUE_SIZE: int = 256
+    WS_DROP_POLICY: str = "drop_oldest"  # drop_oldest|drop_newest|disconnect
+    WS_SEND_TIMEOUT_S: float = 5.0
+
+    # how notifications reach sockets held by other uvicorn workers
+    NOTIFY_BUS: str = "inprocess"  # inprocess|sqlite|redis
+    NOTIFY_BUS_PATH: str = ""  # sqlite backend; default DATA_DIR/notify_bus.db
+    NOTIFY_BUS_POLL_MS: int = 20
+    REDIS_URL: str = "redis://localhost:6379/0"
 
-    LLM_MODE: str = "off"  # off|groq
+    # durable background jobs (patrol summaries), stored in the main DB
+    JOB_WORKERS: int = 2  # jobs run concurrently per API worker
+    JOB_POLL_S: float = 1.0  # picks up jobs queued by other workers / before a restart
+    JOB_LEASE_S: float = 120.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_S: float = 5.0  # doubles per failed attempt
+
+    # officer GPS pings: applied to the in-memory index at once, written to the DB in batches
+    LOCATION_FLUSH_S: float = 2.0
+    LOCATION_BATCH_MAX: int = 5000
+    LOCATION_TRACK: bool = False  # also keep a track history (officer_tracks)
+    LOCATION_TRACK_MIN_S: float = 10.0  # at most one track point per officer per interval
+
+    LLM_MODE: str = "off"  # off|groq|local|transformers
     GROQ_API_KEY: str = ""
     GROQ_MODEL: str = "llama-3.1-8b-instant"
+    GROQ_BASE_URL: str = "https://api.groq.com/openai/v1"
+
+    # air-gapped sites: an OpenAI-compatible server on the LAN (llama.cpp, vLLM, Ollama /v1) ...
+    LLM_LOCAL_URL: str = "http://localhost:8080/v1"
+    LLM_LOCAL_MODEL: str = "local"
+    LLM_LOCAL_API_KEY: str = ""
+    # ... or a small instruction model in-process (pip install transformers torch)
+    LLM_TRANSFORMERS_MODEL: str = "Qwen/Qwen2.5-0.5B-Instruct"
+
+    LLM_MAX_TOKENS: int = 400  # output budget
+    LLM_PROMPT_TOKEN_BUDGET: int = 2000  # alerts + RAG context are trimmed to fit
+    LLM_DEADLINE_S: float = 20.0  # past this the template summary is used
+    DIGEST_AREA_CELL_DEG: float = 0.01  # alerts are grouped per ~1 km cell in summaries
+    DIGEST_EXEMPLARS: int = 2  # alert ids listed per group
+
+    # shared LLM HTTP client (created/closed with the app)
+    LLM_TIMEOUT_S: float = 30.0
+    LLM_MAX_CONNECTIONS: int = 10
+    LLM_MAX_KEEPALIVE: int = 10
+    LLM_MAX_CONCURRENCY: int = 4  # in-flight LLM calls per API worker
+    LLM_MAX_RETRIES: int = 3  # on 429/5xx/connection errors, jittered exponential backoff
+    LLM_RETRY_BASE_S: float = 0.5
+    LLM_BREAKER_THRESHOLD: int = 5  # consecutive failures before falling back to the template
+    LLM_BREAKER_RESET_S: float = 30.0
+    LLM_STREAM: bool = False  # push summary tokens to the officer's WebSocket as they arrive
+    LLM_CACHE_PATH: str = ""  # default DATA_DIR/llm_cache.db
+    LLM_CACHE_MAX_BYTES: int = 20 * 1024 * 1024  # 0 disables the response cache
 
     def cors_list(self) -> List[str]:
         return [o.strip() for o in self.CORS_ORIGINS.split(",") if o.strip()]
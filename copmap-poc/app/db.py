@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .config import settings
 
@@ -8,25 +9,92 @@ class Base(DeclarativeBase):
     pass
 
 
-def _sqlite_url() -> str:
+def _sqlite_url(driver: str = "sqlite") -> str:
     # absolute path makes sqlite behave consistently in docker + local
     db_path = os.path.abspath(settings.SQLITE_PATH)
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    return f"sqlite:///{db_path}"
+    return f"{driver}:///{db_path}"
 
 
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    """
+    Per-connection storage tuning. WAL lets readers (dashboard list queries)
+    run alongside the alert writer; synchronous=NORMAL is durable in WAL mode
+    except for the last commits on power loss.
+    """
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        if settings.SQLITE_PROFILE.lower() == "production":
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+            # negative cache_size is in KiB rather than pages
+            cur.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    finally:
+        cur.close()
+
+
+_sync_url = settings.DATABASE_URL or _sqlite_url()
 engine = create_engine(
-    _sqlite_url(),
-    connect_args={"check_same_thread": False},
+    _sync_url,
+    connect_args=_connect_args(_sync_url),
     pool_pre_ping=True,
 )
 
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _sqlite_pragmas)
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Async engine for the hot paths (alert intake, patrol end) so DB I/O doesn't
+# block the event loop that also serves the officer WebSockets.
+_async_url = settings.ASYNC_DATABASE_URL or _sqlite_url("sqlite+aiosqlite")
+async_engine = create_async_engine(
+    _async_url,
+    connect_args=_connect_args(_async_url),
+    pool_pre_ping=True,
+)
+
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 def init_db():
     from . import models  # noqa: F401
     Base.metadata.create_all(bind=engine)
+    migrate_db()
+
+
+def migrate_db():
+    """
+    Bring an existing DB file up to the current models. create_all only creates
+    missing tables, so columns and indexes added later are applied here.
+    Only additive changes (nullable columns, indexes) are handled.
+    """
+    from . import models  # noqa: F401
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                if not col.nullable and col.server_default is None:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{col.name} without a default")
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"))
+            for idx in table.indexes:
+                idx.create(conn, checkfirst=True)
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("PRAGMA optimize"))
 
 
 def get_db():
@@ -35,3 +103,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,61 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict
+
+from fastapi.responses import JSONResponse
+
+from .config import settings
+from .models import Alert
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json keeps everything working
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available. Content must already be wire-ready."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=max(settings.ALERT_METADATA_CACHE_SIZE, 0))
+def _decode_metadata_cached(raw: str) -> Dict[str, Any]:
+    return json.loads(raw)
+
+
+def decode_metadata(raw: str | None) -> Dict[str, Any]:
+    """
+    Decoded Alert.metadata_json. Identical JSON strings (common for camera
+    alerts) share one cached dict, so treat the result as read-only.
+    """
+    if not raw:
+        return {}
+    return _decode_metadata_cached(raw)
+
+
+def alert_to_wire(row: Alert, metadata: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Alert row -> AlertOut-shaped dict, shared by the REST responses and WebSocket events."""
+    return {
+        "id": row.id,
+        "type": row.type,
+        "priority": row.priority,
+        "lat": row.lat,
+        "lon": row.lon,
+        "confidence": row.confidence,
+        "status": row.status,
+        "created_at": row.created_at.isoformat(),
+        "assigned_officer_id": row.assigned_officer_id,
+        "metadata": decode_metadata(row.metadata_json) if metadata is None else metadata,
+    }
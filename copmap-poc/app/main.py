@@ -1,16 +1,27 @@
+import json
 import os
+import threading
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
 
 from .config import settings
 from .db import init_db
+from .schemas import LocationPingIn
 from .ws import manager
+from .services.rag_service import rag_service
+from .services.job_queue import job_queue
+from .services.llm_service import llm_service
+from .services.location_service import location_tracker
+from .services import patrol_service  # noqa: F401  (registers the summary job handler)
 
 from .routers.health import router as health_router
 from .routers.alerts import router as alerts_router
 from .routers.patrols import router as patrols_router
 from .routers.rag import router as rag_router
 from .routers.documents import router as documents_router
+from .routers.jobs import router as jobs_router
+from .routers.officers import router as officers_router
 
 
 def create_app() -> FastAPI:
@@ -25,9 +36,24 @@ def create_app() -> FastAPI:
     )
 
     @app.on_event("startup")
-    def _startup():
+    async def _startup():
         os.makedirs(settings.DATA_DIR, exist_ok=True)
         init_db()
+        await manager.start_bus(settings.NOTIFY_BUS)
+        await llm_service.start()
+        await job_queue.start()
+        await location_tracker.start()
+        if settings.RAG_WARMUP:
+            # /health answers right away; /ready flips once the model is loaded
+            threading.Thread(target=rag_service.warmup, name="rag-warmup", daemon=True).start()
+
+    @app.on_event("shutdown")
+    async def _shutdown():
+        await job_queue.stop()
+        await location_tracker.stop()
+        await llm_service.stop()
+        await manager.stop_bus()
+        rag_service.executor.shutdown()
 
     # REST routers
     app.include_router(health_router)
@@ -35,17 +61,36 @@ def create_app() -> FastAPI:
     app.include_router(patrols_router)
     app.include_router(rag_router)
     app.include_router(documents_router)
+    app.include_router(jobs_router)
+    app.include_router(officers_router)
 
-    # WebSocket: officer live alerts
+    # WebSocket: officer live alerts (+ optional topic groups, e.g. ?topics=station:12,priority:P1)
     @app.websocket("/ws/officers/{officer_id}")
-    async def ws_officer(websocket: WebSocket, officer_id: str):
-        await manager.connect(officer_id, websocket)
+    async def ws_officer(websocket: WebSocket, officer_id: str, topics: str = ""):
+        conn = await manager.connect(officer_id, websocket, topics.split(","))
         try:
             while True:
-                # keepalive / allow client pings
-                await websocket.receive_text()
+                # keepalive / client pings, {"action": "subscribe"|"unsubscribe", "topics": [...]}
+                # or a GPS fix {"type": "location", "lat": ..., "lon": ..., "ts": ...}
+                msg = await websocket.receive_text()
+                try:
+                    data = json.loads(msg)
+                except ValueError:
+                    continue
+                if not isinstance(data, dict):
+                    continue
+                if data.get("action") == "subscribe":
+                    manager.subscribe(conn, data.get("topics") or [])
+                elif data.get("action") == "unsubscribe":
+                    manager.unsubscribe(conn, data.get("topics") or [])
+                elif data.get("type") == "location":
+                    try:
+                        ping = LocationPingIn.model_validate({**data, "officer_id": officer_id})
+                    except ValidationError:
+                        continue
+                    await location_tracker.record([ping.model_dump()])
         except WebSocketDisconnect:
-            manager.disconnect(officer_id)
+            manager.disconnect(conn)
 
     return app
 
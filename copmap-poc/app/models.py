@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import String, Float, DateTime, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
 
@@ -18,6 +18,18 @@ class Officer(Base):
     alerts: Mapped[list["Alert"]] = relationship(back_populates="assigned_officer")
 
 
+class OfficerTrack(Base):
+    """GPS history, one row per kept ping (LOCATION_TRACK); clustered by officer and time."""
+    __tablename__ = "officer_tracks"
+
+    officer_id: Mapped[str] = mapped_column(String(64), ForeignKey("officers.id"), primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    lat: Mapped[float] = mapped_column(Float)
+    lon: Mapped[float] = mapped_column(Float)
+
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+
 class Patrol(Base):
     __tablename__ = "patrols"
 
@@ -32,11 +44,19 @@ class Patrol(Base):
 
     location_text: Mapped[str | None] = mapped_column(String(200), nullable=True)
 
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     risk_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    generated_with: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # JSON list of the RAG hits the summary was generated from: [{doc_id, distance, score, content}]
+    rag_context_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     incidents: Mapped[list["Incident"]] = relationship(back_populates="patrol")
 
+    __table_args__ = (
+        Index("ix_patrols_officer_start", "officer_id", "start_time"),
+    )
+
 
 class Alert(Base):
     __tablename__ = "alerts"
@@ -59,6 +79,14 @@ class Alert(Base):
 
     incidents: Mapped[list["Incident"]] = relationship(back_populates="alert")
 
+    # match list_alerts filters (+ newest-first order) and the patrol window scan
+    __table_args__ = (
+        Index("ix_alerts_created", "created_at", "id"),
+        Index("ix_alerts_status_created", "status", "created_at", "id"),
+        Index("ix_alerts_priority_created", "priority", "created_at", "id"),
+        Index("ix_alerts_officer_created", "assigned_officer_id", "created_at", "id"),
+    )
+
 
 class Incident(Base):
     __tablename__ = "incidents"
@@ -78,3 +106,29 @@ class Incident(Base):
 
     patrol: Mapped[Patrol | None] = relationship(back_populates="incidents")
     alert: Mapped[Alert | None] = relationship(back_populates="incidents")
+
+
+class Job(Base):
+    """Background work (e.g. patrol summaries) that must survive a restart."""
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(60))
+    status: Mapped[str] = mapped_column(String(20), default="queued")  # queued|running|done|failed
+
+    payload_json: Mapped[str] = mapped_column(Text, default="{}")
+    result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # WebSocket topic told about completion (usually officer:<id>)
+    notify_topic: Mapped[str | None] = mapped_column(String(120), nullable=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # a running job whose lease has expired (worker died) is picked up again
+    lease_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+    )
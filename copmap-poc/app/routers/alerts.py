@@ -1,21 +1,33 @@
 # app/routers/alerts.py
 
-import json
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any
+from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..config import settings
+from ..db import SessionLocal, get_async_db, get_db
+from ..encoders import FastJSONResponse, alert_to_wire, dumps
 from ..models import Alert
-from ..schemas import AlertCreate, AlertOut, AlertUpdate
-from ..services.alert_service import create_alert_and_notify
+from ..schemas import AlertBatchOut, AlertCreate, AlertOut, AlertUpdate
+from ..services.alert_service import (
+    alerts_query,
+    create_alert_and_notify,
+    create_alerts_batch_and_notify,
+    encode_alert_cursor,
+)
+
+EXPORT_FETCH_SIZE = 1000
 
 router = APIRouter(prefix="/api/v1/alerts", tags=["alerts"])
 
 
-@router.post("", response_model=AlertOut)
-async def create_alert(payload: AlertCreate, db: Session = Depends(get_db)):
+@router.post("", response_model=AlertOut, response_class=FastJSONResponse)
+async def create_alert(payload: AlertCreate, db: AsyncSession = Depends(get_async_db)):
     alert_id = f"alert_{uuid.uuid4().hex[:10]}"
 
     row = await create_alert_and_notify(
@@ -29,59 +41,104 @@ async def create_alert(payload: AlertCreate, db: Session = Depends(get_db)):
         metadata=payload.metadata,
     )
 
-    return AlertOut(
-        id=row.id,
-        type=row.type,
-        priority=row.priority,
-        lat=row.lat,
-        lon=row.lon,
-        confidence=row.confidence,
-        status=row.status,
-        created_at=row.created_at,
-        assigned_officer_id=row.assigned_officer_id,
-        metadata=json.loads(row.metadata_json or "{}"),
-    )
+    return FastJSONResponse(alert_to_wire(row, payload.metadata))
 
 
-@router.get("", response_model=list[AlertOut])
+@router.post("/batch", response_model=AlertBatchOut, response_class=FastJSONResponse)
+async def create_alerts_batch(
+    items: list[dict[str, Any]] = Body(..., examples=[[{
+        "type": "crowd_density", "priority": "P2", "lat": 12.9716, "lon": 77.5946, "confidence": 0.9,
+    }]]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if len(items) > settings.ALERT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.ALERT_BATCH_MAX} alerts")
+
+    # validate per item so one bad alert doesn't reject the whole batch
+    results: list[dict[str, Any]] = []
+    valid: list[tuple[int, AlertCreate]] = []
+    for i, raw in enumerate(items):
+        try:
+            valid.append((i, AlertCreate.model_validate(raw)))
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False, include_input=False)
+            results.append({"index": i, "status": "invalid", "alert": None, "errors": errors})
+
+    rows = await create_alerts_batch_and_notify(db, [
+        {
+            "alert_id": f"alert_{uuid.uuid4().hex[:10]}",
+            "type_": p.type,
+            "priority": p.priority,
+            "lat": p.lat,
+            "lon": p.lon,
+            "confidence": p.confidence,
+            "metadata": p.metadata,
+        }
+        for _, p in valid
+    ])
+
+    for (i, p), row in zip(valid, rows):
+        results.append({"index": i, "status": "created", "alert": alert_to_wire(row, p.metadata), "errors": []})
+    results.sort(key=lambda r: r["index"])
+
+    return FastJSONResponse({"created": len(rows), "failed": len(items) - len(rows), "results": results})
+
+
+@router.get("", response_model=list[AlertOut], response_class=FastJSONResponse)
 def list_alerts(
     status: str | None = None,
     priority: str | None = None,
     assigned_officer_id: str | None = None,
     limit: int = 200,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
-    q = db.query(Alert)
-
-    if status:
-        q = q.filter(Alert.status == status)
-    if priority:
-        q = q.filter(Alert.priority == priority)
-    if assigned_officer_id:
-        q = q.filter(Alert.assigned_officer_id == assigned_officer_id)
-
-    rows = q.order_by(Alert.created_at.desc()).limit(min(max(limit, 1), 500)).all()
-
-    out: list[AlertOut] = []
-    for r in rows:
-        out.append(
-            AlertOut(
-                id=r.id,
-                type=r.type,
-                priority=r.priority,
-                lat=r.lat,
-                lon=r.lon,
-                confidence=r.confidence,
-                status=r.status,
-                created_at=r.created_at,
-                assigned_officer_id=r.assigned_officer_id,
-                metadata=json.loads(r.metadata_json or "{}"),
-            )
-        )
-    return out
-
-
-@router.patch("/{alert_id}", response_model=AlertOut)
+    """
+    Newest first. When more rows exist, the X-Next-Cursor response header
+    holds the cursor for the next page.
+    """
+    limit = min(max(limit, 1), 500)
+    try:
+        q = alerts_query(status, priority, assigned_officer_id, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = db.execute(q.limit(limit + 1)).scalars().all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_alert_cursor(rows[-1].created_at, rows[-1].id)
+
+    return FastJSONResponse([alert_to_wire(r) for r in rows], headers=headers)
+
+
+@router.get("/export")
+def export_alerts(
+    status: str | None = None,
+    priority: str | None = None,
+    assigned_officer_id: str | None = None,
+    cursor: str | None = None,
+):
+    """Stream every matching alert as NDJSON (one AlertOut per line), newest first."""
+    try:
+        q = alerts_query(status, priority, assigned_officer_id, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def rows():
+        # own session: the request-scoped one is closed before the body is streamed
+        db = SessionLocal()
+        try:
+            result = db.execute(q.execution_options(yield_per=EXPORT_FETCH_SIZE))
+            for r in result.scalars():
+                yield dumps(alert_to_wire(r)) + b"\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@router.patch("/{alert_id}", response_model=AlertOut, response_class=FastJSONResponse)
 def update_alert(alert_id: str, payload: AlertUpdate, db: Session = Depends(get_db)):
     row = db.get(Alert, alert_id)
     if not row:
@@ -96,15 +153,4 @@ def update_alert(alert_id: str, payload: AlertUpdate, db: Session = Depends(get_
     db.commit()
     db.refresh(row)
 
-    return AlertOut(
-        id=row.id,
-        type=row.type,
-        priority=row.priority,
-        lat=row.lat,
-        lon=row.lon,
-        confidence=row.confidence,
-        status=row.status,
-        created_at=row.created_at,
-        assigned_officer_id=row.assigned_officer_id,
-        metadata=json.loads(row.metadata_json or "{}"),
-    )
+    return FastJSONResponse(alert_to_wire(row))
@@ -1,6 +1,17 @@
-from fastapi import APIRouter
-from ..schemas import RagIngestIn
+import asyncio
+import codecs
+import json
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.formparsers import MultiPartException, MultiPartParser
+from ..encoders import dumps
+from ..config import settings
+from ..schemas import RagIngestBatchIn, RagIngestBatchOut, RagIngestIn, VideoIngestOut
 from ..services.rag_service import rag_service
+from ..services.video_ingest import ingest_video_batch
 
 router = APIRouter(prefix="/api/v1/documents", tags=["documents"])
 
@@ -9,5 +20,167 @@ router = APIRouter(prefix="/api/v1/documents", tags=["documents"])
 def ingest(payload: RagIngestIn):
     meta = dict(payload.metadata or {})
     meta["doc_type"] = payload.doc_type
-    rag_service.ingest(doc_id=payload.doc_id, content=payload.content, metadata=meta)
-    return {"status": "ingested", "doc_id": payload.doc_id}
+    changed = rag_service.ingest(doc_id=payload.doc_id, content=payload.content, metadata=meta)
+    return {"status": "ingested", "doc_id": payload.doc_id, "changed": changed}
+
+
+@router.post("/ingest/batch", response_model=RagIngestBatchOut)
+def ingest_batch(payload: RagIngestBatchIn):
+    docs = []
+    for d in payload.documents:
+        meta = dict(d.metadata or {})
+        meta["doc_type"] = d.doc_type
+        docs.append({"doc_id": d.doc_id, "content": d.content, "metadata": meta})
+    out = rag_service.ingest_many(docs)
+    return RagIngestBatchOut(ingested=out["ingested"], skipped=out["skipped"])
+
+
+@router.post("/ingest/videos", response_model=VideoIngestOut)
+async def ingest_videos(request: Request):
+    """
+    Body: NDJSON, one sample_videos-style metadata object per line. The body is
+    read as a stream and ingested in batches; text is rendered server-side.
+    """
+    totals = {"records": 0, "ingested": 0, "skipped": 0, "failed": 0}
+    batch: list = []
+
+    async def flush():
+        out = await run_in_threadpool(ingest_video_batch, batch[:])
+        batch.clear()
+        for k, v in out.items():
+            totals[k] += v
+
+    buf = b""
+    async for piece in request.stream():
+        buf += piece
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            if line.strip():
+                batch.append(_parse_line(line))
+            if len(batch) >= settings.VIDEO_INGEST_BATCH:
+                await flush()
+    if buf.strip():
+        batch.append(_parse_line(buf))
+    if batch:
+        await flush()
+    return VideoIngestOut(**totals)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return {}  # counted as failed
+
+
+@router.post("/upload")
+async def upload(
+    request: Request,
+    doc_id: str,
+    doc_type: str = "SOP",
+    metadata: str = "{}",
+    progress: bool = False,
+):
+    """
+    Ingest a large text document without holding it in memory: the body (raw
+    text, or a multipart form with a `file` part) is spooled to disk, then
+    read back in blocks through the sentence chunker and embedded batch by
+    batch. With ?progress=true the response is NDJSON progress events.
+    """
+    try:
+        meta = json.loads(metadata)
+        if not isinstance(meta, dict):
+            raise ValueError
+    except ValueError:
+        raise HTTPException(status_code=400, detail="metadata must be a JSON object")
+    meta["doc_type"] = doc_type
+
+    # early out; the cap itself is enforced on the bytes read (chunked bodies have no length)
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Upload too large")
+
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        # starlette spools file parts to a SpooledTemporaryFile as they arrive
+        try:
+            form = await MultiPartParser(request.headers, _capped_stream(request)).parse()
+        except MultiPartException as e:
+            raise HTTPException(status_code=400, detail=e.message)
+        part = form.get("file")
+        if part is None or isinstance(part, str):
+            raise HTTPException(status_code=400, detail="multipart upload needs a 'file' part")
+        spool, size = part.file, part.size or 0
+    else:
+        spool, size = await _spool_body(request)
+
+    def run(report=None) -> Dict[str, Any]:
+        try:
+            out = rag_service.ingest_stream(doc_id, _text_blocks(spool), meta, progress=report)
+        finally:
+            spool.close()
+        return {"status": "ingested", "doc_id": doc_id, "bytes": size, **out}
+
+    if not progress:
+        return await run_in_threadpool(run)
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def report(stats: Dict[str, int]):
+        loop.call_soon_threadsafe(events.put_nowait, {"event": "progress", **stats})
+
+    async def produce():
+        try:
+            done = await asyncio.to_thread(run, report)
+            await events.put({"event": "done", **done})
+        except Exception as e:
+            await events.put({"event": "error", "detail": f"{type(e).__name__}: {e}"})
+
+    async def stream():
+        task = asyncio.create_task(produce())
+        try:
+            while True:
+                event = await events.get()
+                yield dumps(event) + b"\n"
+                if event["event"] in ("done", "error"):
+                    break
+        finally:
+            await task
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def _capped_stream(request: Request):
+    """request.stream() that raises 413 as soon as more than UPLOAD_MAX_BYTES have arrived."""
+    size = 0
+    async for piece in request.stream():
+        size += len(piece)
+        if size > settings.UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Upload too large")
+        yield piece
+
+
+async def _spool_body(request: Request):
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_BYTES)
+    size = 0
+    try:
+        async for piece in _capped_stream(request):
+            size += len(piece)
+            spool.write(piece)
+    except HTTPException:
+        spool.close()
+        raise
+    return spool, size
+
+
+def _text_blocks(f: BinaryIO, block_size: int = 64 * 1024) -> Iterator[str]:
+    """Decoded text in fixed-size blocks; multi-byte characters split across blocks are kept intact."""
+    f.seek(0)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while block := f.read(block_size):
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
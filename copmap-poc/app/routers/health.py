@@ -1,8 +1,78 @@
-from fastapi import APIRouter
-from ..schemas import HealthOut
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..db import engine, get_async_db
+from ..models import Job
+from ..schemas import HealthOut, ReadyOut
+from ..services.job_queue import job_queue
+from ..services.llm_service import llm_service
+from ..services.location_service import location_tracker
+from ..services.rag_service import rag_service
+from ..ws import manager
 
 router = APIRouter(tags=["health"])
 
 @router.get("/health", response_model=HealthOut)
 def health():
+    # liveness only: never touches the DB or the embedding model
     return HealthOut(status="ok")
+
+
+@router.get("/ready", response_model=ReadyOut, responses={503: {"model": ReadyOut}})
+def ready():
+    checks = {}
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        checks["db"] = "ok"
+    except Exception as e:
+        checks["db"] = f"error: {type(e).__name__}"
+
+    if rag_service.loaded:
+        checks["rag"] = "ok"
+    elif rag_service.state == "lazy" and not settings.RAG_WARMUP:
+        checks["rag"] = "lazy"
+    elif rag_service.state == "error":
+        checks["rag"] = f"error: {rag_service.error}"
+    else:
+        checks["rag"] = rag_service.state
+
+    ok = checks["db"] == "ok" and checks["rag"] in ("ok", "lazy")
+    out = ReadyOut(status="ready" if ok else "not_ready", checks=checks)
+    return out if ok else JSONResponse(status_code=503, content=out.model_dump())
+
+
+@router.get("/metrics/ws")
+def ws_metrics():
+    return manager.stats()
+
+
+@router.get("/metrics/jobs")
+async def job_metrics(db: AsyncSession = Depends(get_async_db)):
+    rows = await db.execute(select(Job.status, func.count()).group_by(Job.status))
+    return {**job_queue.stats(), "by_status": dict(rows.all())}
+
+
+@router.get("/metrics/locations")
+def location_metrics():
+    return location_tracker.stats()
+
+
+@router.get("/metrics/llm")
+def llm_metrics():
+    return llm_service.stats()
+
+
+@router.get("/metrics/rag")
+def rag_metrics():
+    return {
+        "state": rag_service.state,
+        "embedding_cache": rag_service.embedding_cache.stats(),
+        "embedding_executor": rag_service.executor.stats(),
+        "lexical_index": rag_service.lexical.stats(),
+        "metadata_index": rag_service.metadata.stats(),
+        "query_cache": rag_service.query_cache.stats(),
+        "collection_version": rag_service.version,
+    }
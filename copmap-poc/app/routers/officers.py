@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..db import get_async_db
+from ..models import OfficerTrack
+from ..schemas import LocationBatchOut, LocationPingIn, TrackPointOut
+from ..services.location_service import location_tracker
+
+router = APIRouter(prefix="/api/v1/officers", tags=["officers"])
+
+
+@router.post("/locations", response_model=LocationBatchOut, status_code=202)
+async def post_locations(pings: list[LocationPingIn]):
+    """
+    GPS pings for any number of officers. Positions are used for assignment
+    immediately; the officers table is updated on the next flush
+    (LOCATION_FLUSH_S), newest fix per officer only.
+    """
+    if len(pings) > settings.LOCATION_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.LOCATION_BATCH_MAX} pings")
+    return await location_tracker.record(p.model_dump() for p in pings)
+
+
+@router.get("/{officer_id}/track", response_model=list[TrackPointOut])
+async def get_track(
+    officer_id: str,
+    since: datetime | None = None,
+    limit: int = 1000,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Stored track points, oldest first (LOCATION_TRACK=true; recent pings appear after the next flush)."""
+    q = select(OfficerTrack.ts, OfficerTrack.lat, OfficerTrack.lon).where(OfficerTrack.officer_id == officer_id)
+    if since is not None:
+        q = q.where(OfficerTrack.ts >= since)
+    rows = await db.execute(q.order_by(OfficerTrack.ts).limit(min(max(limit, 1), 10000)))
+    return [{"ts": ts, "lat": lat, "lon": lon} for ts, lat, lon in rows]
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import get_async_db, get_db
 from ..models import Patrol
-from ..schemas import PatrolStartIn, PatrolOut, PatrolEndIn, PatrolSummaryOut
-from ..services.patrol_service import start_patrol, end_patrol_and_summarize
-from ..services.rag_service import rag_service
+from ..schemas import PatrolStartIn, PatrolOut, PatrolEndIn, PatrolEndOut, PatrolSummaryOut
+from ..services.job_queue import job_to_wire
+from ..services.patrol_service import start_patrol, end_patrol, load_rag_context, summarize_patrol
 from ..config import settings
 
 router = APIRouter(prefix="/api/v1/patrols", tags=["patrols"])
@@ -20,35 +21,39 @@ def start(payload: PatrolStartIn, db: Session = Depends(get_db)):
     )
 
 
-@router.post("/{patrol_id}/end", response_model=PatrolOut)
-async def end(patrol_id: str, payload: PatrolEndIn, db: Session = Depends(get_db)):
+@router.post("/{patrol_id}/end", response_model=PatrolEndOut, status_code=202)
+async def end(patrol_id: str, payload: PatrolEndIn, db: AsyncSession = Depends(get_async_db)):
+    """Returns at once; the summary is generated by a background job (poll /api/v1/jobs/{id} or listen on WS)."""
     try:
-        row = await end_patrol_and_summarize(db, patrol_id, payload.notes)
+        row, job = await end_patrol(db, patrol_id, payload.notes)
     except ValueError:
         raise HTTPException(status_code=404, detail="Patrol not found")
-    return PatrolOut(
+    return PatrolEndOut(
         id=row.id, officer_id=row.officer_id, start_time=row.start_time,
         end_time=row.end_time, location_text=row.location_text,
-        summary=row.summary, risk_score=row.risk_score
+        summary=row.summary, risk_score=row.risk_score,
+        job=job_to_wire(job),
     )
 
 
 @router.get("/{patrol_id}/summary", response_model=PatrolSummaryOut)
-def summary(patrol_id: str, db: Session = Depends(get_db)):
-    patrol = db.get(Patrol, patrol_id)
+async def summary(patrol_id: str, refresh: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Stored summary and the RAG context it was generated from; ?refresh=true regenerates both."""
+    patrol = await db.get(Patrol, patrol_id)
     if not patrol:
         raise HTTPException(status_code=404, detail="Patrol not found")
     if not patrol.summary:
         raise HTTPException(status_code=400, detail="Summary not generated yet")
 
-    query_text = patrol.location_text or "patrol"
-    rag_hits = rag_service.query(query_text=query_text, k=3)
-    rag_docs = [h["content"] for h in rag_hits]
+    if refresh:
+        patrol = await summarize_patrol(db, patrol)
 
+    context = load_rag_context(patrol)
     return PatrolSummaryOut(
         patrol_id=patrol.id,
         summary=patrol.summary,
         risk_score=float(patrol.risk_score or 0.0),
-        generated_with=settings.LLM_MODE.lower(),
-        rag_context_docs=rag_docs,
+        generated_with=patrol.generated_with or settings.LLM_MODE.lower(),
+        rag_context_docs=[c["content"] for c in context],
+        rag_context=[{k: v for k, v in c.items() if k != "content"} for c in context],
     )
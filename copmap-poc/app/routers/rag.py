@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from ..schemas import RagQueryIn, RagQueryOut
 from ..services.rag_service import rag_service
 
@@ -6,6 +6,10 @@ router = APIRouter(prefix="/api/v1/rag", tags=["rag"])
 
 
 @router.post("/query", response_model=RagQueryOut)
-def query(payload: RagQueryIn):
-    hits = rag_service.query(query_text=payload.query, k=payload.k, where=payload.filters)
+async def query(payload: RagQueryIn):
+    try:
+        hits = await rag_service.aquery(query_text=payload.query, k=payload.k, where=payload.filters, mode=payload.mode)
+    except ValueError as e:
+        # unsupported or malformed filters (ours or Chroma's)
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {e}")
     return RagQueryOut(query=payload.query, results=hits)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Any, Optional, Dict, List
+from typing import Any, Literal, Optional, Dict, List
 from datetime import datetime
 
 
@@ -7,6 +7,11 @@ class HealthOut(BaseModel):
     status: str = "ok"
 
 
+class ReadyOut(BaseModel):
+    status: str  # ready|not_ready
+    checks: Dict[str, str] = Field(default_factory=dict)
+
+
 class OfficerCreate(BaseModel):
     id: str
     name: str
@@ -23,6 +28,25 @@ class OfficerOut(BaseModel):
     last_lon: Optional[float] = None
 
 
+class LocationPingIn(BaseModel):
+    officer_id: str
+    lat: float = Field(..., ge=-90.0, le=90.0)
+    lon: float = Field(..., ge=-180.0, le=180.0)
+    ts: Optional[datetime] = None  # device fix time; default: time received
+
+
+class LocationBatchOut(BaseModel):
+    accepted: int
+    stale: int  # older than a fix already applied for that officer
+    unknown: int  # officer id not in the DB
+
+
+class TrackPointOut(BaseModel):
+    ts: datetime
+    lat: float
+    lon: float
+
+
 class AlertCreate(BaseModel):
     type: str = Field(..., examples=["crowd_density"])
     priority: str = Field(..., examples=["P1", "P2", "P3", "P4"])
@@ -45,6 +69,19 @@ class AlertOut(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+class AlertBatchItemOut(BaseModel):
+    index: int
+    status: str  # created|invalid
+    alert: Optional[AlertOut] = None
+    errors: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class AlertBatchOut(BaseModel):
+    created: int
+    failed: int
+    results: List[AlertBatchItemOut]
+
+
 class AlertUpdate(BaseModel):
     status: str = Field(..., examples=["ack", "resolved"])
 
@@ -70,12 +107,28 @@ class PatrolEndIn(BaseModel):
     notes: Optional[str] = None
 
 
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued|running|done|failed
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class PatrolEndOut(PatrolOut):
+    job: JobOut
+
+
 class PatrolSummaryOut(BaseModel):
     patrol_id: str
     summary: str
     risk_score: float
     generated_with: str
     rag_context_docs: List[str] = Field(default_factory=list)
+    rag_context: List[Dict[str, Any]] = Field(default_factory=list)  # doc_id + distance/score per doc
 
 
 class RagIngestIn(BaseModel):
@@ -85,10 +138,29 @@ class RagIngestIn(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+class RagIngestBatchIn(BaseModel):
+    documents: List[RagIngestIn]
+
+
+class RagIngestBatchOut(BaseModel):
+    status: str = "ingested"
+    ingested: int
+    skipped: int
+
+
+class VideoIngestOut(BaseModel):
+    status: str = "ingested"
+    records: int
+    ingested: int
+    skipped: int
+    failed: int
+
+
 class RagQueryIn(BaseModel):
     query: str
     k: int = 4
     filters: Dict[str, Any] = Field(default_factory=dict)
+    mode: Optional[Literal["vector", "lexical", "hybrid"]] = None  # default: settings.RAG_QUERY_MODE
 
 
 class RagQueryOut(BaseModel):
@@ -0,0 +1,95 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List
+
+_PRIORITY_RANK = {"P1": 0, "P2": 1, "P3": 2, "P4": 3}
+
+
+def _ts(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def build_digest(alerts: List[Dict[str, Any]], cell_deg: float = 0.01, exemplars: int = 2) -> Dict[str, Any]:
+    """
+    Compact view of a patrol's alerts: one group per (type, priority, area
+    cell) with counts, time span, statuses and the most confident exemplars.
+    Groups are ordered by priority, then size, so truncation drops the least
+    important ones first.
+    """
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for a in alerts:
+        lat, lon = a.get("lat"), a.get("lon")
+        cell = (round(lat / cell_deg) * cell_deg, round(lon / cell_deg) * cell_deg) if lat is not None and lon is not None else None
+        key = (a.get("type"), a.get("priority", "P4"), cell)
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = {
+                "type": key[0],
+                "priority": key[1],
+                "area": cell,
+                "count": 0,
+                "first": None,
+                "last": None,
+                "statuses": Counter(),
+                "exemplars": [],
+            }
+        g["count"] += 1
+        g["statuses"][a.get("status") or "open"] += 1
+        t = _ts(a.get("created_at"))
+        if t is not None:
+            g["first"] = t if g["first"] is None or t < g["first"] else g["first"]
+            g["last"] = t if g["last"] is None or t > g["last"] else g["last"]
+        g["exemplars"].append((a.get("confidence") or 0.0, a.get("id")))
+
+    ordered = sorted(groups.values(), key=lambda g: (_PRIORITY_RANK.get(g["priority"], 9), -g["count"]))
+    for g in ordered:
+        g["exemplars"] = [i for _, i in sorted(g["exemplars"], key=lambda e: e[0], reverse=True)[:exemplars]]
+        g["statuses"] = dict(g["statuses"])
+
+    return {
+        "total": len(alerts),
+        "by_priority": dict(sorted(Counter(a.get("priority", "P4") for a in alerts).items())),
+        "groups": ordered,
+    }
+
+
+def _group_line(g: Dict[str, Any]) -> str:
+    line = f"- {g['priority']} {g['type']} x{g['count']}"
+    if g["area"] is not None:
+        line += f" @ ({g['area'][0]:.3f},{g['area'][1]:.3f})"
+    if g["first"] is not None:
+        span = g["first"].strftime("%H:%M")
+        if g["last"] != g["first"]:
+            span += "-" + g["last"].strftime("%H:%M")
+        line += f" {span}"
+    line += " [" + ", ".join(f"{s} {n}" for s, n in sorted(g["statuses"].items())) + "]"
+    if g["exemplars"]:
+        line += " e.g. " + ", ".join(str(e) for e in g["exemplars"])
+    return line
+
+
+def render_digest(digest: Dict[str, Any], max_chars: int) -> List[str]:
+    """Digest as text lines that fit in max_chars; dropped groups are summarized in one line."""
+    if not digest["total"]:
+        return []
+    head = f"{digest['total']} alerts (" + ", ".join(f"{p}: {n}" for p, n in digest["by_priority"].items()) + ")"
+    lines, used = [head], len(head) + 1
+    groups = digest["groups"]
+    for i, g in enumerate(groups):
+        line = _group_line(g)
+        # leave room for the "... more" line while groups remain
+        reserve = 48 if i + 1 < len(groups) else 0
+        if used + len(line) + 1 + reserve > max_chars:
+            rest = groups[i:]
+            lines.append(f"- ... {len(rest)} more groups ({sum(r['count'] for r in rest)} alerts)")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return lines
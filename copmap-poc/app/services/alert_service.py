@@ -1,42 +1,142 @@
+import base64
 import json
-import math
+from collections import defaultdict
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import Select, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..models import Alert, Officer
-from ..ws import manager
+from ..config import settings
+from ..encoders import alert_to_wire
+from ..models import Alert
+from ..ws import manager, officer_topic
+from .assignment import assign_alerts
+from .officer_index import officer_index, haversine_matrix_km, haversine_km as _haversine_km  # noqa: F401
 
+# rows of the alert x officer distance matrix computed per NumPy pass
+_ASSIGN_CHUNK = 512
 
-def _haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
-    lat1, lon1 = a
-    lat2, lon2 = b
-    r = 6371.0
-    p1 = math.radians(lat1)
-    p2 = math.radians(lat2)
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    x = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
-    return 2 * r * math.asin(math.sqrt(x))
+# alert metadata keys that map onto WebSocket broadcast groups (station:12, sector:15)
+_GROUP_KEYS = ("station", "sector")
 
 
-def assign_officer(db: Session, lat: float, lon: float, max_km: float = 5.0) -> Optional[str]:
-    officers = db.query(Officer).all()
-    best_id = None
-    best_dist = 1e9
+def alert_topics(priority: str, metadata: Dict[str, Any]) -> List[str]:
+    topics = [f"priority:{priority}"]
+    for key in _GROUP_KEYS:
+        value = metadata.get(key)
+        if value not in (None, ""):
+            topics.append(f"{key}:{value}")
+    return topics
 
-    for o in officers:
-        if o.last_lat is None or o.last_lon is None:
-            continue
-        dist = _haversine_km((lat, lon), (o.last_lat, o.last_lon))
-        if dist < best_dist and dist <= max_km:
-            best_dist = dist
-            best_id = o.id
 
-    return best_id
+def _nearest_officer(lat: float, lon: float, max_km: float | None = None) -> Optional[str]:
+    hit = officer_index.nearest(lat, lon, settings.ASSIGN_MAX_KM if max_km is None else max_km)
+    return hit[0] if hit else None
+
+
+def _nearest_officers(coords: List[Tuple[float, float]], max_km: float | None = None) -> List[Optional[str]]:
+    """Nearest officer (within max_km) for every (lat, lon) in one vectorized haversine pass."""
+    max_km = settings.ASSIGN_MAX_KM if max_km is None else max_km
+    ids, o_lat, o_lon = officer_index.snapshot()
+    if not ids or not coords:
+        return [None] * len(coords)
+
+    pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    out: List[Optional[str]] = []
+    for start in range(0, len(pts), _ASSIGN_CHUNK):
+        chunk = pts[start:start + _ASSIGN_CHUNK]
+        dist = haversine_matrix_km(chunk[:, 0], chunk[:, 1], o_lat, o_lon)
+        best = dist.argmin(axis=1)
+        best_dist = dist[np.arange(len(chunk)), best]
+        out.extend(ids[j] if d <= max_km else None for j, d in zip(best.tolist(), best_dist.tolist()))
+    return out
+
+
+def assign_officer(db: Session, lat: float, lon: float, max_km: float | None = None) -> Optional[str]:
+    officer_index.ensure_loaded(db)
+    return _nearest_officer(lat, lon, max_km)
+
+
+def assign_officers_batch(
+    db: Session, coords: List[Tuple[float, float]], max_km: float | None = None
+) -> List[Optional[str]]:
+    officer_index.ensure_loaded(db)
+    return _nearest_officers(coords, max_km)
+
+
+async def _open_alert_counts(db: AsyncSession) -> Dict[str, int]:
+    """Unresolved alerts per assigned officer."""
+    rows = await db.execute(
+        select(Alert.assigned_officer_id, func.count())
+        .where(Alert.assigned_officer_id.is_not(None), Alert.status != "resolved")
+        .group_by(Alert.assigned_officer_id)
+    )
+    return {officer_id: n for officer_id, n in rows}
+
+
+async def _assign_batch(db: AsyncSession, items: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """
+    Officers for a burst of alerts, solved together: nearest candidates from
+    one distance matrix, then a priority- and load-weighted assignment that
+    keeps any officer at or under ASSIGN_CAPACITY open alerts.
+    """
+    coords = [(it["lat"], it["lon"]) for it in items]
+    if settings.ASSIGN_SOLVER == "nearest":
+        return _nearest_officers(coords)
+    ids, o_lat, o_lon = officer_index.snapshot()
+    if not ids:
+        return [None] * len(items)
+
+    return assign_alerts(
+        coords, [it["priority"] for it in items], ids, o_lat, o_lon, await _open_alert_counts(db),
+        settings.ASSIGN_CAPACITY, settings.ASSIGN_MAX_KM,
+        candidates=settings.ASSIGN_CANDIDATES,
+        load_penalty_km=settings.ASSIGN_LOAD_PENALTY_KM,
+        solver=settings.ASSIGN_SOLVER,
+    )
+
+
+def encode_alert_cursor(created_at: datetime, alert_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{alert_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_alert_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        ts, alert_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), alert_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def alerts_query(
+    status: str | None = None,
+    priority: str | None = None,
+    assigned_officer_id: str | None = None,
+    cursor: str | None = None,
+) -> Select:
+    """
+    Newest-first alert query with keyset pagination on (created_at, id).
+    Seeking past the cursor uses the composite indexes, so deep pages cost
+    the same as the first one (no OFFSET scan).
+    """
+    q = select(Alert)
+    if status:
+        q = q.where(Alert.status == status)
+    if priority:
+        q = q.where(Alert.priority == priority)
+    if assigned_officer_id:
+        q = q.where(Alert.assigned_officer_id == assigned_officer_id)
+    if cursor:
+        ts, alert_id = decode_alert_cursor(cursor)
+        q = q.where(tuple_(Alert.created_at, Alert.id) < tuple_(ts, alert_id))
+    return q.order_by(Alert.created_at.desc(), Alert.id.desc())
 
 
 async def create_alert_and_notify(
-    db: Session,
+    db: AsyncSession,
     alert_id: str,
     type_: str,
     priority: str,
@@ -45,7 +145,8 @@ async def create_alert_and_notify(
     confidence: float,
     metadata: dict,
 ) -> Alert:
-    assigned = assign_officer(db, lat, lon)
+    await officer_index.aensure_loaded(db)
+    assigned = _nearest_officer(lat, lon)
 
     row = Alert(
         id=alert_id,
@@ -60,26 +161,82 @@ async def create_alert_and_notify(
         metadata_json=json.dumps(metadata or {}, ensure_ascii=False),
     )
     db.add(row)
-    db.commit()
-    db.refresh(row)
+    # every column is set above, so no refresh round trip is needed
+    await db.commit()
 
     payload = {
         "event": "alert_created",
-        "alert": {
-            "id": row.id,
-            "type": row.type,
-            "priority": row.priority,
-            "lat": row.lat,
-            "lon": row.lon,
-            "confidence": row.confidence,
-            "status": row.status,
-            "created_at": row.created_at.isoformat(),
-            "assigned_officer_id": row.assigned_officer_id,
-            "metadata": metadata or {},
-        },
+        "alert": alert_to_wire(row, metadata or {}),
     }
 
+    # only enqueues; socket writes happen on the per-connection sender tasks
+    topics = alert_topics(priority, metadata or {})
     if assigned:
-        await manager.send_to_officer(assigned, payload)
+        topics.append(officer_topic(assigned))
+    manager.publish(topics, payload)
 
     return row
+
+
+async def create_alerts_batch_and_notify(db: AsyncSession, items: List[Dict[str, Any]]) -> List[Alert]:
+    """
+    Insert many alerts in one transaction.
+
+    items carry the create_alert_and_notify keyword args (alert_id, type_, priority,
+    lat, lon, confidence, metadata). Officers are assigned to the whole batch at
+    once (see _assign_batch); each officer (and broadcast group) gets one
+    "alerts_created" message for the whole batch.
+    """
+    if not items:
+        return []
+
+    await officer_index.aensure_loaded(db)
+    assigned = await _assign_batch(db, items)
+    now = datetime.utcnow()
+
+    rows: List[Alert] = []
+    for it, officer_id in zip(items, assigned):
+        rows.append(Alert(
+            id=it["alert_id"],
+            type=it["type_"],
+            priority=it["priority"],
+            lat=it["lat"],
+            lon=it["lon"],
+            confidence=it["confidence"],
+            status="open",
+            created_at=now,
+            assigned_officer_id=officer_id,
+            metadata_json=json.dumps(it.get("metadata") or {}, ensure_ascii=False),
+        ))
+
+    # Core bulk insert: one executemany, no per-row flush/refresh round trips
+    await db.execute(insert(Alert), [
+        {
+            "id": r.id,
+            "type": r.type,
+            "priority": r.priority,
+            "lat": r.lat,
+            "lon": r.lon,
+            "confidence": r.confidence,
+            "status": r.status,
+            "created_at": r.created_at,
+            "assigned_officer_id": r.assigned_officer_id,
+            "metadata_json": r.metadata_json,
+        }
+        for r in rows
+    ])
+    await db.commit()
+
+    per_topic: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for it, r in zip(items, rows):
+        meta = it.get("metadata") or {}
+        wire = alert_to_wire(r, meta)
+        if r.assigned_officer_id:
+            per_topic[officer_topic(r.assigned_officer_id)].append(wire)
+        for topic in alert_topics(r.priority, meta):
+            per_topic[topic].append(wire)
+
+    for topic, alerts in per_topic.items():
+        manager.publish([topic], {"event": "alerts_created", "alerts": alerts})
+
+    return rows
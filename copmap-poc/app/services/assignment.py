@@ -0,0 +1,180 @@
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .officer_index import EARTH_RADIUS_KM, KM_PER_DEG_LAT
+
+# cost multiplier per priority: a P1 alert is worth moving a P4 alert to a farther officer
+PRIORITY_WEIGHTS = {"P1": 8.0, "P2": 4.0, "P3": 2.0, "P4": 1.0}
+
+# rows of the alert x officer matrix computed per NumPy pass
+_CHUNK = 512
+
+
+def candidate_count(n_alerts: int, candidates: int, capacity: int) -> int:
+    # upper bound: a tight cluster needs n/capacity distinct officers before anyone can be left out
+    return max(candidates, -(-n_alerts // max(capacity, 1)))
+
+
+def _haversine_rows(pts: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """km from pts[i] to each (lat[i, j], lon[i, j])."""
+    p1, l1 = np.radians(pts[:, :1]), np.radians(pts[:, 1:])
+    p2, l2 = np.radians(lat), np.radians(lon)
+    x = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin((l2 - l1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(x, 0.0, 1.0)))
+
+
+def _near_box(pts: np.ndarray, o_lat: np.ndarray, o_lon: np.ndarray, max_km: float) -> np.ndarray:
+    dlat = max_km / KM_PER_DEG_LAT
+    lat_lo, lat_hi = pts[:, 0].min() - dlat, pts[:, 0].max() + dlat
+    cos_lat = math.cos(math.radians(min(89.0, max(abs(lat_lo), abs(lat_hi)))))
+    dlon = max_km / (KM_PER_DEG_LAT * cos_lat)
+    lon_lo, lon_hi = pts[:, 1].min() - dlon, pts[:, 1].max() + dlon
+    if lon_lo < -180.0 or lon_hi > 180.0:
+        # box crosses the antimeridian; not worth special-casing
+        return np.arange(len(o_lat))
+    mask = (o_lat >= lat_lo) & (o_lat <= lat_hi) & (o_lon >= lon_lo) & (o_lon <= lon_hi)
+    return np.flatnonzero(mask)
+
+
+def nearest_candidates(
+    coords: Sequence[Tuple[float, float]],
+    o_lat: np.ndarray,
+    o_lon: np.ndarray,
+    k: int,
+    max_km: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The k nearest officers of every alert: (officer column indices, km), both
+    shaped (alerts, k), nearest first. Officers farther than max_km get inf.
+    """
+    pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    # only officers inside the alerts' bounding box grown by max_km can be candidates
+    cols = _near_box(pts, o_lat, o_lon, max_km)
+    k = min(k, len(cols))
+    idx = np.zeros((len(pts), k), dtype=np.int64)
+    dist = np.full((len(pts), k), np.inf)
+    if not k:
+        return idx, dist
+    # rank on a local equirectangular projection (no trig per pair), then measure the k kept exactly
+    scale = math.cos(math.radians(float(pts[:, 0].mean())))
+    sub_y, sub_x = o_lat[cols], o_lon[cols] * scale
+    for start in range(0, len(pts), _CHUNK):
+        chunk = pts[start:start + _CHUNK]
+        d2 = (chunk[:, :1] - sub_y[None, :]) ** 2 + (chunk[:, 1:] * scale - sub_x[None, :]) ** 2
+        part = cols[np.argpartition(d2, k - 1, axis=1)[:, :k]]
+        part_d = _haversine_rows(chunk, o_lat[part], o_lon[part])
+        order = np.argsort(part_d, axis=1)
+        idx[start:start + len(chunk)] = np.take_along_axis(part, order, axis=1)
+        dist[start:start + len(chunk)] = np.take_along_axis(part_d, order, axis=1)
+    dist[dist > max_km] = np.inf
+    return idx, dist
+
+
+def _hungarian(cand_idx, cand_dist, weights, loads, capacity, load_penalty_km) -> np.ndarray:
+    from scipy.optimize import linear_sum_assignment
+
+    n = len(cand_idx)
+    out = np.full(n, -1, dtype=np.int64)
+    feasible = np.isfinite(cand_dist)
+    if not n or not feasible.any():
+        return out
+
+    # one column per free slot; the s-th extra alert on an officer costs s more load penalties
+    officers, inverse = np.unique(cand_idx[feasible], return_inverse=True)
+    demand = np.bincount(inverse, minlength=len(officers))
+    slot_officer, slot_rank = [], []
+    for j, col in enumerate(officers.tolist()):
+        load = loads.get(col, 0)
+        free = min(max(capacity - load, 0), int(demand[j]))
+        slot_officer.extend([j] * free)
+        slot_rank.extend(range(load, load + free))
+    if not slot_officer:
+        return out
+
+    slot_officer = np.asarray(slot_officer)
+    slot_rank = np.asarray(slot_rank, dtype=np.float64)
+    # alert x officer distances for the officers that have free slots
+    rows, cols = np.nonzero(feasible)
+    d = np.full((n, len(officers)), np.inf)
+    d[rows, np.searchsorted(officers, cand_idx[rows, cols])] = cand_dist[rows, cols]
+
+    # benefit form: every real slot is cheaper than leaving the alert unassigned (0),
+    # and leaving a high priority alert out forfeits more
+    miss = weights * (2.0 * np.where(feasible, cand_dist, 0).max() + load_penalty_km * (capacity + 1) + 1.0)
+    cost = weights[:, None] * (d[:, slot_officer] + load_penalty_km * slot_rank[None, :]) - miss[:, None]
+    cost[~np.isfinite(cost)] = 0.0
+
+    r, c = linear_sum_assignment(cost)
+    hit = cost[r, c] < 0
+    out[r[hit]] = officers[slot_officer[c[hit]]]
+    return out
+
+
+def _greedy(cand_idx, cand_dist, weights, loads, capacity, load_penalty_km) -> np.ndarray:
+    """Highest priority first, each to its cheapest officer with a free slot (also the no-scipy fallback)."""
+    out = np.full(len(cand_idx), -1, dtype=np.int64)
+    used = dict(loads)
+    for i in np.argsort(-weights, kind="stable").tolist():
+        best, best_cost = -1, np.inf
+        for col, dist in zip(cand_idx[i].tolist(), cand_dist[i].tolist()):
+            load = used.get(col, 0)
+            if dist == np.inf or load >= capacity:
+                continue
+            c = dist + load_penalty_km * load
+            if c < best_cost:
+                best, best_cost = col, c
+        if best >= 0:
+            out[i] = best
+            used[best] = used.get(best, 0) + 1
+    return out
+
+
+def assign_alerts(
+    coords: Sequence[Tuple[float, float]],
+    priorities: Sequence[str],
+    ids: List[str],
+    o_lat: np.ndarray,
+    o_lon: np.ndarray,
+    loads: Dict[str, int],
+    capacity: int,
+    max_km: float,
+    candidates: int = 8,
+    load_penalty_km: float = 0.5,
+    solver: str = "hungarian",
+) -> List[Optional[str]]:
+    """
+    Officer id (or None) per alert, minimizing the priority-weighted sum of
+    distance + load_penalty_km * (open alerts the officer already has,
+    including earlier ones from this batch). loads maps officer id -> open
+    alerts. No officer ends up with more than `capacity` open alerts; when
+    there are not enough free slots the lowest priority alerts are left out.
+
+    Each alert first only considers its `candidates` nearest officers; the
+    set is doubled while some alert is left out with all of them in range.
+    """
+    if not ids or not len(coords):
+        return [None] * len(coords)
+    weights = np.array([PRIORITY_WEIGHTS.get(p, 1.0) for p in priorities], dtype=np.float64)
+    if solver == "hungarian":
+        try:
+            import scipy.optimize  # noqa: F401
+        except ImportError:
+            solver = "greedy"
+    solve = _greedy if solver == "greedy" else _hungarian
+
+    k_max = min(candidate_count(len(coords), candidates, capacity), len(ids))
+    k = min(candidates, k_max)
+    while True:
+        cand_idx, cand_dist = nearest_candidates(coords, o_lat, o_lon, k, max_km)
+        col_loads = {j: loads[ids[j]] for j in np.unique(cand_idx).tolist() if ids[j] in loads}
+        out = solve(cand_idx, cand_dist, weights, col_loads, capacity, load_penalty_km)
+        # fewer columns than asked: every officer in range is already a candidate
+        if k >= k_max or cand_idx.shape[1] < k:
+            break
+        starved = (out < 0) & np.isfinite(cand_dist[:, -1])
+        if not starved.any():
+            break
+        k = min(k_max, k * 2)
+    return [ids[j] if j >= 0 else None for j in out.tolist()]
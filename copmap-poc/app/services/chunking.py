@@ -0,0 +1,71 @@
+import re
+from collections import deque
+from typing import Iterable, Iterator, List, Tuple
+
+# sentence ends (., !, ? followed by whitespace) or paragraph breaks
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def iter_sentences(pieces: Iterable[str], max_buffer_chars: int = 20000) -> Iterator[str]:
+    """
+    Split a stream of text pieces (file lines, upload chunks) into sentences
+    without ever holding more than one unfinished sentence in memory. Text
+    without any sentence break is cut at whitespace once the buffer grows
+    past max_buffer_chars.
+    """
+    buf = ""
+    for piece in pieces:
+        buf += piece
+        parts = _SENTENCE_BREAK.split(buf)
+        buf = parts.pop()
+        for s in parts:
+            s = " ".join(s.split())
+            if s:
+                yield s
+        while len(buf) > max_buffer_chars:
+            cut = buf.rfind(" ", 0, max_buffer_chars)
+            cut = cut if cut > 0 else max_buffer_chars
+            head, buf = buf[:cut], buf[cut:]
+            head = " ".join(head.split())
+            if head:
+                yield head
+    tail = " ".join(buf.split())
+    if tail:
+        yield tail
+
+
+def _split_long(sentence: str, max_words: int) -> Iterator[Tuple[str, int]]:
+    words = sentence.split()
+    for i in range(0, len(words), max_words):
+        part = words[i:i + max_words]
+        yield " ".join(part), len(part)
+
+
+def iter_chunks(pieces: Iterable[str], max_words: int = 160, overlap_words: int = 32) -> Iterator[str]:
+    """
+    Sentence-aware windows of at most max_words words (a cheap proxy for model
+    tokens). Whole trailing sentences worth up to overlap_words are repeated at
+    the start of the next window so context isn't lost at the boundary.
+    """
+    window: deque[Tuple[str, int]] = deque()
+    count = 0
+    fresh = False  # window holds text not yet emitted
+
+    for sentence in iter_sentences(pieces):
+        for part, n in _split_long(sentence, max_words):
+            if count + n > max_words and fresh:
+                yield " ".join(s for s, _ in window)
+                keep: List[Tuple[str, int]] = []
+                kept = 0
+                for s, sn in reversed(window):
+                    if kept + sn > overlap_words or kept + sn + n > max_words:
+                        break
+                    keep.insert(0, (s, sn))
+                    kept += sn
+                window, count = deque(keep), kept
+            window.append((part, n))
+            count += n
+            fresh = True
+
+    if fresh:
+        yield " ".join(s for s, _ in window)
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    LRU of text embeddings keyed by sha256(model + text). With a path, entries
+    are also written to a small SQLite file so they survive restarts and are
+    shared by workers; memory stays the first lookup tier.
+    """
+
+    def __init__(self, model_name: str, max_items: int = 10000, path: str = ""):
+        self.model_name = model_name
+        self.max_items = max_items
+        self.path = os.path.abspath(path) if path else ""
+        self._mem: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return content_hash(f"{self.model_name}\x00{text}")
+
+    def _disk(self) -> sqlite3.Connection | None:
+        if not self.path:
+            return None
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+            self._db = db
+        return self._db
+
+    def _remember(self, key: str, vec: List[float]):
+        self._mem[key] = vec
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            pending = []
+            for k in keys:
+                vec = self._mem.get(k)
+                if vec is not None:
+                    self._mem.move_to_end(k)
+                    found[k] = vec
+                else:
+                    pending.append(k)
+
+            db = self._disk()
+            if db is not None and pending:
+                for i in range(0, len(pending), 500):
+                    part = pending[i:i + 500]
+                    marks = ",".join("?" * len(part))
+                    for k, blob in db.execute(f"SELECT key, vec FROM embeddings WHERE key IN ({marks})", part):
+                        vec = np.frombuffer(blob, dtype=np.float32).tolist()
+                        self._remember(k, vec)
+                        found[k] = vec
+
+            self.hits += len(found)
+            self.misses += len(set(pending) - found.keys())
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        with self._lock:
+            for k, vec in items.items():
+                self._remember(k, vec)
+            db = self._disk()
+            if db is not None:
+                with db:
+                    db.execute("BEGIN")
+                    db.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                        [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items.items()],
+                    )
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._mem), "max_items": self.max_items, "hits": self.hits, "misses": self.misses}
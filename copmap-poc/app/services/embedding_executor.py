@@ -0,0 +1,137 @@
+import asyncio
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+EncodeFn = Callable[[List[str]], List[List[float]]]
+
+# --- process-pool worker side: each worker loads its own copy of the model ---
+
+_worker_model = None
+_worker_batch_size = 64
+
+
+def _process_init(model_name: str, batch_size: int):
+    global _worker_model, _worker_batch_size
+    from sentence_transformers import SentenceTransformer
+
+    _worker_model = SentenceTransformer(model_name)
+    _worker_batch_size = batch_size
+
+
+def _process_encode(texts: List[str]) -> List[List[float]]:
+    return _worker_model.encode(texts, batch_size=_worker_batch_size, normalize_embeddings=True).tolist()
+
+
+class _LoopState:
+    def __init__(self):
+        self.pending: List[Tuple[List[str], asyncio.Future]] = []
+        self.pending_texts = 0
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class EmbeddingExecutor:
+    """
+    Runs embedding off the event loop. Requests arriving within window_ms of
+    each other are merged into one encode call (up to max_batch texts), which
+    is much cheaper than one call per request on CPU.
+    """
+
+    def __init__(
+        self,
+        encode: EncodeFn,
+        kind: str = "thread",
+        workers: int = 1,
+        window_ms: float = 5.0,
+        max_batch: int = 64,
+        model_name: str = "",
+        batch_size: int = 64,
+    ):
+        self.kind = kind.lower()
+        self.workers = max(1, workers)
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._model_name = model_name
+        self._batch_size = batch_size
+        # process workers load their own model, so they cannot use the caller's encode
+        self._encode = _process_encode if self.kind == "process" else encode
+        self._pool: Executor | None = None
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self.calls = 0
+        self.texts = 0
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                import multiprocessing
+
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_process_init,
+                    initargs=(self._model_name, self._batch_size),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed")
+        return self._pool
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState()
+
+        fut = loop.create_future()
+        state.pending.append((list(texts), fut))
+        state.pending_texts += len(texts)
+
+        if state.pending_texts >= self.max_batch:
+            self._flush(loop, state)
+        elif state.timer is None:
+            state.timer = loop.call_later(self.window_s, self._flush, loop, state)
+        return await fut
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, state: _LoopState):
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        batch, state.pending, state.pending_texts = state.pending, [], 0
+        if not batch:
+            return
+
+        texts = [t for ts, _ in batch for t in ts]
+        self.calls += 1
+        self.texts += len(texts)
+        job = loop.run_in_executor(self._executor(), self._encode, texts)
+
+        def _distribute(done: asyncio.Future):
+            exc = asyncio.CancelledError() if done.cancelled() else done.exception()
+            vectors = None if exc else done.result()
+            start = 0
+            for ts, fut in batch:
+                if fut.done():
+                    start += len(ts)
+                    continue
+                if exc:
+                    fut.set_exception(exc)
+                else:
+                    fut.set_result(vectors[start:start + len(ts)])
+                start += len(ts)
+
+        job.add_done_callback(_distribute)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "encode_calls": self.calls,
+            "texts": self.texts,
+            "avg_batch": round(self.texts / self.calls, 2) if self.calls else 0.0,
+        }
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..db import AsyncSessionLocal
+from ..models import Job
+from ..ws import manager
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def job_to_wire(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "result": json.loads(job.result_json) if job.result_json else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobQueue:
+    """
+    Durable job queue on the app's own database. Jobs are rows, so they
+    survive restarts and can be claimed by any API worker; each worker runs
+    at most `concurrency` jobs at a time. A claimed job carries a lease that
+    is renewed while its handler runs: if the worker dies, the job becomes
+    claimable again once the lease expires. A failed attempt is retried after
+    retry_backoff_s, doubling per attempt (lease_until doubles as not-before).
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        poll_s: float = 1.0,
+        lease_s: float = 120.0,
+        max_attempts: int = 3,
+        retry_backoff_s: float = 5.0,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.poll_s = poll_s
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.retry_backoff_s = retry_backoff_s
+        self.handlers: Dict[str, Handler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wake: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping = False
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.lost_leases = 0
+
+    def register(self, kind: str):
+        def deco(fn: Handler) -> Handler:
+            self.handlers[kind] = fn
+            return fn
+        return deco
+
+    async def enqueue(self, db: AsyncSession, kind: str, payload: Dict[str, Any], notify_topic: str | None = None) -> Job:
+        job = Job(
+            id=f"job_{uuid.uuid4().hex[:12]}",
+            kind=kind,
+            status=QUEUED,
+            payload_json=json.dumps(payload),
+            notify_topic=notify_topic,
+            attempts=0,
+            created_at=datetime.utcnow(),
+        )
+        db.add(job)
+        await db.commit()
+        self.wake()
+        return job
+
+    def wake(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # --- workers ---
+
+    async def start(self):
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._wake.set()  # drain whatever survived the last shutdown
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        self._stopping = True
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._loop = None
+
+    async def _worker(self):
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("job claim failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_s)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # another job may be waiting; let an idle worker look for it
+            self._wake.set()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # e.g. "database is locked" while recording the outcome; the lease
+                # expires and the job is claimed again, this worker carries on
+                logger.exception("job %s (%s) could not be completed", job.id, job.kind)
+
+    async def _claim(self) -> Job | None:
+        now = datetime.utcnow()
+        claimable = or_(
+            and_(Job.status == QUEUED, or_(Job.lease_until.is_(None), Job.lease_until <= now)),
+            and_(Job.status == RUNNING, Job.lease_until < now),
+        )
+        async with AsyncSessionLocal() as db:
+            for _ in range(3):
+                job_id = (await db.execute(
+                    select(Job.id).where(claimable).order_by(Job.created_at).limit(1)
+                )).scalar()
+                if job_id is None:
+                    return None
+                # compare-and-set: only one worker (in any process) wins the row
+                res = await db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, claimable)
+                    .values(
+                        status=RUNNING,
+                        attempts=Job.attempts + 1,
+                        started_at=now,
+                        lease_until=now + timedelta(seconds=self.lease_s),
+                    )
+                )
+                await db.commit()
+                if res.rowcount == 1:
+                    return await db.get(Job, job_id)
+        return None
+
+    async def _run(self, job: Job):
+        handler = self.handlers.get(job.kind)
+        result: Dict[str, Any] | None = None
+        error: str | None = None
+
+        if handler is None:
+            error = f"no handler for job kind {job.kind!r}"
+        elif job.attempts > self.max_attempts:
+            error = f"gave up after {self.max_attempts} attempts"
+        else:
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            try:
+                result = await handler(json.loads(job.payload_json or "{}"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("job %s (%s) failed", job.id, job.kind)
+                error = f"{type(e).__name__}: {e}"
+                if job.attempts < self.max_attempts:
+                    backoff = timedelta(seconds=self.retry_backoff_s * 2 ** (job.attempts - 1))
+                    await self._finish(job, QUEUED, None, error, not_before=datetime.utcnow() + backoff)
+                    return
+            finally:
+                heartbeat.cancel()
+
+        await self._finish(job, FAILED if error else DONE, result, error)
+
+    def _owned(self, job: Job):
+        # still this claim: nobody re-claimed the row after our lease lapsed
+        return and_(Job.id == job.id, Job.status == RUNNING, Job.attempts == job.attempts)
+
+    async def _heartbeat(self, job: Job):
+        """Renew the lease while the handler runs, so a slow job is not claimed twice."""
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Job)
+                        .where(self._owned(job))
+                        .values(lease_until=datetime.utcnow() + timedelta(seconds=self.lease_s))
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("lease renewal for job %s failed", job.id)
+
+    async def _finish(
+        self,
+        job: Job,
+        status: str,
+        result: Dict[str, Any] | None,
+        error: str | None,
+        not_before: datetime | None = None,
+    ):
+        values: Dict[str, Any] = {"status": status, "error": error, "lease_until": not_before}
+        if status in (DONE, FAILED):
+            values["result_json"] = json.dumps(result) if result is not None else None
+            values["finished_at"] = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(update(Job).where(self._owned(job)).values(**values))
+            await db.commit()
+            if res.rowcount != 1:
+                # our lease expired and another worker owns the job now; its outcome wins
+                logger.warning("job %s: lease lost, dropping this attempt's %s", job.id, status)
+                self.lost_leases += 1
+                return
+            row = await db.get(Job, job.id)
+
+        if status == DONE:
+            self.completed += 1
+        elif status == FAILED:
+            self.failed += 1
+        else:
+            self.retried += 1
+        if status in (DONE, FAILED) and row.notify_topic:
+            manager.publish([row.notify_topic], {"event": "job_update", "job": job_to_wire(row)})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "concurrency": self.concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "lost_leases": self.lost_leases,
+        }
+
+
+job_queue = JobQueue(
+    concurrency=settings.JOB_WORKERS,
+    poll_s=settings.JOB_POLL_S,
+    lease_s=settings.JOB_LEASE_S,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_backoff_s=settings.JOB_RETRY_BACKOFF_S,
+)
@@ -0,0 +1,268 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+# keeps identifiers whole: "OFF_001", "cam-12", "mg_road" are single terms
+_TOKEN = re.compile(r"[a-z0-9]+(?:[_\-][a-z0-9]+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were what when "
+    "where which who with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _is_num(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _contains(value: Any, arg: Any) -> bool:
+    # list metadata reaches the chunks as "a,b" (see RagService._sanitize_metadata)
+    if isinstance(value, (list, tuple)):
+        return arg in value
+    if isinstance(value, str):
+        return str(arg) in value.split(",")
+    return value == arg
+
+
+def _range(op: str, value: Any, arg: Any) -> bool:
+    if not _is_num(arg):
+        raise ValueError(f"{op} needs a number, got {arg!r}")
+    if not _is_num(value):
+        return False
+    return {"$gt": value > arg, "$gte": value >= arg, "$lt": value < arg, "$lte": value <= arg}[op]
+
+
+_OPS = {
+    "$eq": lambda value, arg: value == arg,
+    "$ne": lambda value, arg: value != arg,
+    "$in": lambda value, arg: value in arg,
+    "$nin": lambda value, arg: value not in arg,
+    "$contains": _contains,
+    "$gt": lambda value, arg: _range("$gt", value, arg),
+    "$gte": lambda value, arg: _range("$gte", value, arg),
+    "$lt": lambda value, arg: _range("$lt", value, arg),
+    "$lte": lambda value, arg: _range("$lte", value, arg),
+}
+
+
+def validate_where(where: Dict[str, Any] | None):
+    """Raise ValueError for operators matches_where does not implement (before any chunk is scanned)."""
+    for key, cond in (where or {}).items():
+        if key in ("$and", "$or"):
+            for c in cond:
+                validate_where(c)
+        elif key.startswith("$"):
+            raise ValueError(f"unsupported filter operator {key!r}")
+        elif isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op not in _OPS:
+                    raise ValueError(f"unsupported filter operator {op!r}")
+                if op in ("$gt", "$gte", "$lt", "$lte") and not _is_num(arg):
+                    raise ValueError(f"{op} needs a number, got {arg!r}")
+
+
+def matches_where(metadata: Dict[str, Any], where: Dict[str, Any] | None) -> bool:
+    """
+    Evaluate the subset of Chroma's `where` syntax the API exposes ($and/$or,
+    $eq/$ne/$in/$nin/$contains, $gt/$gte/$lt/$lte); other operators raise ValueError.
+    """
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, c) for c in cond):
+                return False
+        else:
+            value = metadata.get(key)
+            if not isinstance(cond, dict):
+                cond = {"$eq": cond}
+            for op, arg in cond.items():
+                test = _OPS.get(op)
+                if test is None:
+                    raise ValueError(f"unsupported filter operator {op!r}")
+                if not test(value, arg):
+                    return False
+    return True
+
+
+class LexicalIndex:
+    """
+    On-disk BM25 inverted index over the same chunks stored in Chroma. Exact
+    tokens (officer IDs, street names) score well here even when the dense
+    embedding barely notices them, and a lookup needs no model at all.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = os.path.abspath(path)
+        self.k1 = k1
+        self.b = b
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._stats: tuple[int, float] | None = None  # (chunk count, avg length), reset on writes
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id TEXT PRIMARY KEY, doc_id TEXT NOT NULL, length INTEGER NOT NULL,"
+                " content TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL,"
+                " PRIMARY KEY (term, chunk_id)) WITHOUT ROWID"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS ix_postings_chunk ON postings (chunk_id)")
+            self._db = db
+        return self._db
+
+    # --- writes ---
+
+    def upsert(self, records: Iterable[Dict[str, Any]]):
+        """records: {id, doc_id, content, metadata}, as written to Chroma."""
+        rows, postings, ids = [], [], []
+        for r in records:
+            terms = Counter(tokenize(r["content"]))
+            ids.append(r["id"])
+            rows.append((r["id"], r["doc_id"], sum(terms.values()), r["content"], json.dumps(r["metadata"])))
+            postings.extend((t, r["id"], tf) for t, tf in terms.items())
+        if not rows:
+            return
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute("BEGIN")
+                self._delete_postings(db, ids)
+                db.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)", rows)
+                db.executemany("INSERT INTO postings VALUES (?, ?, ?)", postings)
+            self._stats = None
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """New metadata for chunks whose text (and so postings) is unchanged."""
+        if not ids:
+            return
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute("BEGIN")
+                db.executemany(
+                    "UPDATE chunks SET metadata = ? WHERE id = ?",
+                    [(json.dumps(m), i) for i, m in zip(ids, metadatas)],
+                )
+
+    def delete(self, ids: List[str]):
+        if not ids:
+            return
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute("BEGIN")
+                self._delete_postings(db, ids)
+                db.executemany("DELETE FROM chunks WHERE id = ?", [(i,) for i in ids])
+            self._stats = None
+
+    @staticmethod
+    def _delete_postings(db: sqlite3.Connection, ids: List[str]):
+        db.executemany("DELETE FROM postings WHERE chunk_id = ?", [(i,) for i in ids])
+
+    def known(self, ids: List[str]) -> set:
+        found: set = set()
+        with self._lock:
+            db = self._conn()
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                marks = ",".join("?" * len(part))
+                found.update(r[0] for r in db.execute(f"SELECT id FROM chunks WHERE id IN ({marks})", part))
+        return found
+
+    # --- search ---
+
+    def _corpus_stats(self, db: sqlite3.Connection) -> tuple[int, float]:
+        if self._stats is None:
+            n, avg = db.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+            self._stats = (n, avg or 0.0)
+        return self._stats
+
+    def search(
+        self,
+        query_text: str,
+        n: int,
+        where: Dict[str, Any] | None = None,
+        doc_ids: set | None = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-n chunks by BM25: [{id, doc_id, content, metadata, score}], best
+        first. doc_ids, when given, restricts scoring to those documents.
+        """
+        validate_where(where)
+        terms = list(dict.fromkeys(tokenize(query_text)))
+        if not terms:
+            return []
+
+        with self._lock:
+            db = self._conn()
+            total, avg_len = self._corpus_stats(db)
+            if not total:
+                return []
+            marks = ",".join("?" * len(terms))
+            df = dict(db.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", terms
+            ))
+            rows = db.execute(
+                f"SELECT p.term, p.chunk_id, p.tf, c.length, c.doc_id FROM postings p JOIN chunks c ON c.id = p.chunk_id"
+                f" WHERE p.term IN ({marks})",
+                terms,
+            ).fetchall()
+
+            scores: Dict[str, float] = {}
+            for term, chunk_id, tf, length, doc_id in rows:
+                if doc_ids is not None and doc_id not in doc_ids:
+                    continue
+                idf = math.log(1 + (total - df[term] + 0.5) / (df[term] + 0.5))
+                norm = tf + self.k1 * (1 - self.b + self.b * length / (avg_len or 1))
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+            ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+            out: List[Dict[str, Any]] = []
+            # filters are checked on the ranked list, a page at a time, until n hits survive
+            page = max(n * 4, 32)
+            for i in range(0, len(ranked), page):
+                part = ranked[i:i + page]
+                marks = ",".join("?" * len(part))
+                stored = {
+                    r[0]: r for r in db.execute(
+                        f"SELECT id, doc_id, content, metadata FROM chunks WHERE id IN ({marks})",
+                        [cid for cid, _ in part],
+                    )
+                }
+                for chunk_id, score in part:
+                    _, doc_id, content, meta = stored[chunk_id]
+                    meta = json.loads(meta)
+                    if not matches_where(meta, where):
+                        continue
+                    out.append({"id": chunk_id, "doc_id": doc_id, "content": content, "metadata": meta, "score": score})
+                    if len(out) >= n:
+                        return out
+            return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total, avg_len = self._corpus_stats(self._conn())
+        return {"chunks": total, "avg_length": round(avg_len, 2)}
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import logging
+import queue
+import random
+import threading
+from typing import Any, Callable, Dict
+
+import httpx
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+TokenCallback = Callable[[str], None]
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class LlmUnavailable(Exception):
+    """The backend could not produce an answer (after retries / within the deadline)."""
+
+
+class LlmBackend:
+    """
+    One way of turning an OpenAI-style chat payload ({model, messages,
+    temperature, max_tokens}) into text. on_token, when given, receives the
+    answer incrementally as it is generated.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+
+    @property
+    def model(self) -> str:
+        raise NotImplementedError
+
+    def available(self) -> bool:
+        return True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def complete(self, payload: Dict[str, Any], on_token: TokenCallback | None = None) -> str:
+        """_complete with every failure except cancellation reported as LlmUnavailable."""
+        try:
+            return await self._complete(payload, on_token)
+        except LlmUnavailable:
+            raise
+        except Exception as e:
+            raise LlmUnavailable(f"{type(e).__name__}: {e}") from e
+
+    async def _complete(self, payload: Dict[str, Any], on_token: TokenCallback | None) -> str:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model": self.model, "calls": self.calls, "retries": self.retries}
+
+
+class OpenAICompatBackend(LlmBackend):
+    """
+    Any /chat/completions server: Groq, or a local llama.cpp / vLLM / Ollama
+    server for air-gapped sites. One pooled AsyncClient is shared by all calls
+    (start()/stop() follow the app lifespan) so requests reuse keep-alive
+    connections.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        model: str,
+        api_key: str = "",
+        require_key: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        super().__init__()
+        self.name = name
+        self.base_url = base_url
+        self._model = model
+        self.api_key = api_key
+        self.require_key = require_key
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._sem: asyncio.Semaphore | None = None
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    def available(self) -> bool:
+        return bool(self.api_key.strip()) or not self.require_key
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(settings.LLM_TIMEOUT_S, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE,
+                ),
+                transport=self._transport,
+            )
+        self._sem = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _http(self) -> httpx.AsyncClient:
+        # scripts and tests may call without the app lifespan
+        if self._client is None or self._sem is None:
+            await self.start()
+        return self._client
+
+    async def _complete(self, payload: Dict[str, Any], on_token: TokenCallback | None) -> str:
+        """POST /chat/completions with bounded concurrency and jittered retries on 429/5xx."""
+        client = await self._http()
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        if on_token is not None:
+            payload = {**payload, "stream": True}
+
+        async with self._sem:
+            for attempt in range(settings.LLM_MAX_RETRIES + 1):
+                self.calls += 1
+                streamed = False
+                try:
+                    if on_token is None:
+                        r = await client.post("/chat/completions", json=payload, headers=headers)
+                        if r.status_code not in _RETRY_STATUS:
+                            r.raise_for_status()
+                            return r.json()["choices"][0]["message"]["content"]
+                    else:
+                        async with client.stream("POST", "/chat/completions", json=payload, headers=headers) as r:
+                            if r.status_code not in _RETRY_STATUS:
+                                r.raise_for_status()
+                                parts = []
+                                async for token in self._iter_sse_tokens(r):
+                                    streamed = True
+                                    parts.append(token)
+                                    on_token(token)
+                                return "".join(parts)
+                    error = f"HTTP {r.status_code}"
+                    retry_after = r.headers.get("retry-after")
+                except httpx.HTTPStatusError as e:
+                    raise LlmUnavailable(f"HTTP {e.response.status_code}") from e
+                except (httpx.TransportError, KeyError, ValueError) as e:
+                    # tokens already pushed to the client cannot be taken back
+                    if streamed:
+                        raise LlmUnavailable(f"stream interrupted: {type(e).__name__}") from e
+                    error, retry_after = f"{type(e).__name__}: {e}", None
+
+                if attempt == settings.LLM_MAX_RETRIES:
+                    break
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        raise LlmUnavailable(f"{error} after {settings.LLM_MAX_RETRIES + 1} attempts")
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: str | None) -> float:
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), 30.0)
+        except ValueError:
+            pass
+        # full jitter: spreads retries from concurrent jobs instead of synchronizing them
+        return random.uniform(0, settings.LLM_RETRY_BASE_S * (2 ** attempt))
+
+    @staticmethod
+    async def _iter_sse_tokens(response: httpx.Response):
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            delta = json.loads(data)["choices"][0].get("delta") or {}
+            if delta.get("content"):
+                yield delta["content"]
+
+
+class TransformersBackend(LlmBackend):
+    """
+    Small instruction model run in-process on CPU with Hugging Face
+    transformers (optional dependency). Generation runs in one background
+    thread, so calls are serialized; the model is loaded on first use.
+    """
+
+    name = "transformers"
+
+    def __init__(self, model_name: str):
+        super().__init__()
+        self.model_name = model_name
+        self._model = None
+        self._tokenizer = None
+        self._load_lock = threading.Lock()
+        self._gen_lock = threading.Lock()
+
+    @property
+    def model(self) -> str:
+        return self.model_name
+
+    def available(self) -> bool:
+        try:
+            import transformers  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _load(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                    self._model = AutoModelForCausalLM.from_pretrained(self.model_name)
+        return self._model, self._tokenizer
+
+    def _generate(self, payload: Dict[str, Any], emit: TokenCallback | None) -> str:
+        model, tok = self._load()
+        inputs = tok.apply_chat_template(
+            payload["messages"], add_generation_prompt=True, return_tensors="pt", return_dict=True
+        )
+        temperature = float(payload.get("temperature") or 0.0)
+        kwargs: Dict[str, Any] = {
+            "max_new_tokens": int(payload.get("max_tokens") or settings.LLM_MAX_TOKENS),
+            "do_sample": temperature > 0,
+        }
+        if temperature > 0:
+            kwargs["temperature"] = temperature
+        # cancelling the awaiting coroutine does not stop the thread; generate stops itself
+        kwargs["max_time"] = settings.LLM_DEADLINE_S
+
+        # a caller that cannot even start within the deadline gives up instead of parking an executor thread
+        if not self._gen_lock.acquire(timeout=settings.LLM_DEADLINE_S):
+            raise LlmUnavailable("transformers backend busy")
+        try:
+            if emit is None:
+                out = model.generate(**inputs, **kwargs)
+                return tok.decode(out[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+
+            from transformers import TextIteratorStreamer
+
+            streamer = TextIteratorStreamer(
+                tok, skip_prompt=True, skip_special_tokens=True, timeout=settings.LLM_DEADLINE_S
+            )
+            errors: list[BaseException] = []
+
+            def run():
+                try:
+                    model.generate(**inputs, **kwargs, streamer=streamer)
+                except BaseException as e:
+                    errors.append(e)
+                    streamer.end()  # unblock the reader below
+
+            worker = threading.Thread(target=run, daemon=True)
+            worker.start()
+            parts = []
+            try:
+                for token in streamer:
+                    if token:
+                        parts.append(token)
+                        emit(token)
+            except queue.Empty:
+                raise LlmUnavailable(f"no token within {settings.LLM_DEADLINE_S}s") from None
+            worker.join()
+            if errors:
+                raise errors[0]
+            return "".join(parts)
+        finally:
+            self._gen_lock.release()
+
+    async def _complete(self, payload: Dict[str, Any], on_token: TokenCallback | None) -> str:
+        self.calls += 1
+        emit = None
+        if on_token is not None:
+            loop = asyncio.get_running_loop()
+
+            def emit(token: str):
+                loop.call_soon_threadsafe(on_token, token)
+
+        try:
+            return await asyncio.to_thread(self._generate, payload, emit)
+        except ImportError as e:
+            raise LlmUnavailable("LLM_MODE=transformers requires the 'transformers' and 'torch' packages") from e
+
+
+def create_backend(mode: str, transport: httpx.AsyncBaseTransport | None = None) -> LlmBackend | None:
+    """LLM_MODE -> backend; None means template summaries only."""
+    mode = (mode or "off").lower()
+    if mode == "off":
+        return None
+    if mode == "groq":
+        return OpenAICompatBackend(
+            "groq", settings.GROQ_BASE_URL, settings.GROQ_MODEL,
+            api_key=settings.GROQ_API_KEY, require_key=True, transport=transport,
+        )
+    if mode == "local":
+        return OpenAICompatBackend(
+            "local", settings.LLM_LOCAL_URL, settings.LLM_LOCAL_MODEL,
+            api_key=settings.LLM_LOCAL_API_KEY, transport=transport,
+        )
+    if mode == "transformers":
+        return TransformersBackend(settings.LLM_TRANSFORMERS_MODEL)
+    raise ValueError(f"Unknown LLM_MODE: {mode}")
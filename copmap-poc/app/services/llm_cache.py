@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+
+
+def prompt_key(payload: Dict[str, Any]) -> str:
+    """
+    Hash of what determines the answer: model, sampling settings and the
+    messages with whitespace collapsed. Transport flags such as `stream` are
+    ignored, so streamed and plain calls share entries.
+    """
+    normalized = {
+        "model": payload.get("model"),
+        "temperature": payload.get("temperature"),
+        "messages": [
+            {"role": m.get("role"), "content": " ".join(str(m.get("content", "")).split())}
+            for m in payload.get("messages", [])
+        ],
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """
+    Persistent prompt -> completion cache in a small SQLite file, shared by
+    workers and kept across restarts. Once the stored text exceeds max_bytes
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 20 * 1024 * 1024):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses (last_used)")
+            self._db = db
+        return self._db
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        size = len(response.encode("utf-8"))
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute("BEGIN IMMEDIATE")
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now),
+                )
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    # walk from least recently used until enough space is freed
+                    excess, victims = total - self.max_bytes, []
+                    for k, s in db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                        if excess <= 0:
+                            break
+                        victims.append((k,))
+                        excess -= s
+                    db.executemany("DELETE FROM responses WHERE key = ?", victims)
+                    self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "entries": count,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,30 +1,162 @@
-from typing import List, Dict, Any
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
 import httpx
 from ..config import settings
+from .llm_backends import LlmBackend, LlmUnavailable, TokenCallback, create_backend
+from .alert_digest import build_digest, render_digest
+from .llm_cache import LlmResponseCache, prompt_key
+
+logger = logging.getLogger(__name__)
+
+# rough chars-per-token for budgeting prompts without loading a tokenizer
+_CHARS_PER_TOKEN = 4
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; while open, callers skip the
+    upstream call entirely. After reset_s one trial call is let through
+    (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold: int = 5, reset_s: float = 30.0):
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_s else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def release(self):
+        # the trial call ended without an outcome (e.g. cancelled); let the next one through
+        self._trial = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
 
 
 class LlmService:
+    """
+    Patrol summaries from the configured backend (LLM_MODE: groq, local
+    OpenAI-compatible server, in-process transformers) with the deterministic
+    template as the fallback whenever the backend is off, failing, or slower
+    than LLM_DEADLINE_S.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: LlmResponseCache | None = None,
+        backend: LlmBackend | None = None,
+    ):
+        self._transport = transport
+        self._backend = backend
+        self._backend_resolved = backend is not None
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_THRESHOLD, settings.LLM_BREAKER_RESET_S)
+        self.cache = cache
+        # prompt key -> completion being generated; identical concurrent prompts share it
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.fallbacks = 0
+        self.timeouts = 0
+        self.coalesced = 0
+
+    @property
+    def backend(self) -> LlmBackend | None:
+        if not self._backend_resolved:
+            self._backend = create_backend(settings.LLM_MODE, transport=self._transport)
+            self._backend_resolved = True
+        return self._backend
+
+    async def start(self):
+        if self.backend is not None:
+            await self.backend.start()
+
+    async def stop(self):
+        if self.backend is not None:
+            await self.backend.stop()
+
+    def enabled(self) -> bool:
+        return self.backend is not None and self.backend.available()
+
     async def generate_patrol_summary(
         self,
         patrol: Dict[str, Any],
         alerts: List[Dict[str, Any]],
         notes: str | None,
         rag_context: List[str],
+        on_token: TokenCallback | None = None,
     ) -> Dict[str, Any]:
-        if settings.LLM_MODE.lower() == "groq" and settings.GROQ_API_KEY.strip():
-            text = await self._groq_summary(patrol, alerts, notes, rag_context)
-            return {"text": text, "generated_with": "groq"}
+        fallback_reason = None
+        # alerts are grouped once; the LLM prompt and the template show the same compact view
+        budget = settings.LLM_PROMPT_TOKEN_BUDGET * _CHARS_PER_TOKEN
+        digest = build_digest(alerts, settings.DIGEST_AREA_CELL_DEG, settings.DIGEST_EXEMPLARS)
+        alert_lines = render_digest(digest, budget // 2)
+
+        if self.enabled():
+            backend = self.backend
+            payload = self._summary_payload(patrol, alert_lines, notes, rag_context, budget)
+            key = prompt_key(payload)
+            cached = await asyncio.to_thread(self.cache.get, key) if self.cache else None
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                return {"text": cached, "generated_with": backend.name, "cached": True}
+
+            if self.breaker.allow():
+                try:
+                    text = await self._single_flight(key, payload, on_token)
+                    self.breaker.record_success()
+                    return {"text": text, "generated_with": backend.name}
+                except LlmUnavailable as e:
+                    self.breaker.record_failure()
+                    fallback_reason = str(e)
+                    logger.warning("LLM summary failed, using template: %s", e)
+                finally:
+                    self.breaker.release()
+            else:
+                fallback_reason = "circuit open"
+            self.fallbacks += 1
+
+        out = self._template_summary(alert_lines, notes, rag_context)
+        if fallback_reason:
+            out["fallback_reason"] = fallback_reason
+        return out
 
+    def _template_summary(self, alert_lines: List[str], notes: str | None, rag_context: List[str]) -> Dict[str, Any]:
         # Fallback: deterministic template (still PoC-useful and always runnable)
-        risk = self._risk_score(alerts)
         lines = []
         lines.append("Executive Summary: Patrol completed; key alerts reviewed and logged.")
         if notes:
             lines.append(f"Officer Notes: {notes}")
-        if alerts:
-            lines.append("Key Alerts:")
-            for a in alerts[:8]:
-                lines.append(f"- {a['priority']} {a['type']} ({a['status']}) @ ({a['lat']:.4f},{a['lon']:.4f})")
+        if alert_lines:
+            lines.append(f"Key Alerts: {alert_lines[0]}")
+            lines.extend(alert_lines[1:])
         else:
             lines.append("Key Alerts: None recorded.")
         if rag_context:
@@ -40,34 +172,99 @@ class LlmService:
             score += weights.get(a.get("priority", "P4"), 0.2)
         return min(1.0, score / 5.0)
 
-    async def _groq_summary(self, patrol, alerts, notes, rag_context) -> str:
+    def _summary_payload(self, patrol, alert_lines: List[str], notes, rag_context, budget: int) -> Dict[str, Any]:
+        # keep the prompt inside LLM_PROMPT_TOKEN_BUDGET: the alert digest already fits
+        # in half of it; RAG snippets (each capped) and notes share the rest
+        rag_context = _fit([" ".join(c.split())[:budget // 4] for c in rag_context], budget * 3 // 8)
+        if notes and len(notes) > budget // 8:
+            notes = notes[:budget // 8] + "..."
+        patrol_line = ", ".join(f"{k}={v}" for k, v in patrol.items() if v is not None)
+        alerts_text = "\n".join(alert_lines) or "None recorded."
+        context_text = "\n".join(f"- {c}" for c in rag_context) or "None."
+
         prompt = (
             "You are an assistant for police operations.\n"
             "Generate a concise end-of-shift patrol summary for the station commander.\n\n"
-            f"Patrol:\n{patrol}\n\n"
-            f"Alerts:\n{alerts}\n\n"
-            f"Officer Notes:\n{notes}\n\n"
-            f"Retrieved SOP/History context:\n{rag_context}\n\n"
+            f"Patrol:\n{patrol_line}\n\n"
+            f"Alerts (grouped by type, priority and area):\n{alerts_text}\n\n"
+            f"Officer Notes:\n{notes or 'None.'}\n\n"
+            f"Retrieved SOP/History context:\n{context_text}\n\n"
             "Return:\n1) Executive Summary (2-3 sentences)\n"
             "2) Key Incidents (bullets)\n3) Recommendations\n4) Risk Indicators\n"
         )
 
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {"Authorization": f"Bearer {settings.GROQ_API_KEY}"}
         payload = {
-            "model": settings.GROQ_MODEL,
+            "model": self.backend.model,
             "messages": [
                 {"role": "system", "content": "You write operationally useful, non-hyped police summaries."},
                 {"role": "user", "content": prompt},
             ],
             "temperature": 0.3,
+            "max_tokens": settings.LLM_MAX_TOKENS,
+        }
+        return payload
+
+    async def _single_flight(self, key: str, payload: Dict[str, Any], on_token: TokenCallback | None) -> str:
+        loop = asyncio.get_running_loop()
+        leader = self._inflight.get(key)
+        if leader is not None and leader.get_loop() is loop:
+            self.coalesced += 1
+            text = await asyncio.shield(leader)
+            if on_token is not None:
+                on_token(text)
+            return text
+
+        fut = self._inflight[key] = loop.create_future()
+        try:
+            try:
+                # the template is better than a summary that arrives after nobody is waiting
+                text = await asyncio.wait_for(self.backend.complete(payload, on_token), settings.LLM_DEADLINE_S)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise LlmUnavailable(f"no answer within {settings.LLM_DEADLINE_S:g}s")
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put, key, payload["model"], text)
+            fut.set_result(text)
+            return text
+        except BaseException as e:
+            err = e if isinstance(e, LlmUnavailable) else LlmUnavailable(f"{type(e).__name__}: {e}")
+            fut.set_exception(err)
+            fut.exception()  # followers re-raise it; don't warn when there are none
+            if isinstance(e, Exception) and err is not e:
+                # e.g. the response cache failing: still a fallback, not an error for the caller
+                raise err from e
+            raise
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": settings.LLM_MODE.lower(),
+            "backend": self.backend.stats() if self.backend else None,
+            "fallbacks": self.fallbacks,
+            "timeouts": self.timeouts,
+            "coalesced": self.coalesced,
+            "cache": self.cache.stats() if self.cache else None,
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
         }
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(url, json=payload, headers=headers)
-            r.raise_for_status()
-            data = r.json()
-            return data["choices"][0]["message"]["content"]
+
+def _fit(items: List[Any], max_chars: int) -> List[Any]:
+    """Longest prefix of items whose rendered size fits in max_chars."""
+    out, used = [], 0
+    for item in items:
+        used += len(str(item)) + 2
+        if used > max_chars:
+            break
+        out.append(item)
+    return out
 
 
-llm_service = LlmService()
+llm_service = LlmService(
+    cache=LlmResponseCache(
+        settings.LLM_CACHE_PATH or os.path.join(settings.DATA_DIR, "llm_cache.db"),
+        max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    ) if settings.LLM_CACHE_MAX_BYTES > 0 else None,
+)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import insert, select, update
+
+from ..config import settings
+from ..db import AsyncSessionLocal
+from ..models import Officer, OfficerTrack
+from .officer_index import officer_index
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_naive(ts: datetime | None) -> datetime:
+    # the DB stores naive UTC (datetime.utcnow) everywhere
+    if ts is None:
+        return datetime.utcnow()
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+class LocationTracker:
+    """
+    Officer GPS pings. A ping moves the officer in officer_index right away,
+    so the next alert is assigned from the fresh position; the DB only gets
+    the newest position per officer, written in one batch every flush_s
+    (an officer pinging every 2s costs one row update per flush, not per ping).
+    With track=True kept pings are also appended to officer_tracks, at most
+    one per officer every track_min_s.
+    """
+
+    def __init__(self, flush_s: float = 2.0, track: bool = False, track_min_s: float = 10.0):
+        self.flush_s = flush_s
+        self.track = track
+        self.track_min_s = track_min_s
+        self._pending: Dict[str, Tuple[float, float, datetime]] = {}
+        self._tracks: List[Dict[str, Any]] = []
+        self._last_ts: Dict[str, datetime] = {}
+        self._last_track: Dict[str, datetime] = {}
+        self._known: set[str] = set()
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self.pings = 0
+        self.stale = 0
+        self.unknown = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.track_rows = 0
+
+    # --- intake ---
+
+    async def record(self, pings: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """pings: {officer_id, lat, lon, ts?}. Returns {accepted, stale, unknown}."""
+        pings = list(pings)
+        out = {"accepted": 0, "stale": 0, "unknown": 0}
+        if not pings:
+            return out
+
+        missing = {p["officer_id"] for p in pings} - self._known
+        if missing or not officer_index.loaded:
+            async with AsyncSessionLocal() as db:
+                # positions applied before the index's first load would be overwritten by it
+                await officer_index.aensure_loaded(db)
+                if missing:
+                    rows = await db.execute(select(Officer.id).where(Officer.id.in_(missing)))
+                    self._known.update(rows.scalars().all())
+
+        for p in pings:
+            officer_id = p["officer_id"]
+            if officer_id not in self._known:
+                out["unknown"] += 1
+                continue
+            ts = _utc_naive(p.get("ts"))
+            last = self._last_ts.get(officer_id)
+            if last is not None and ts < last:
+                # late delivery of an older fix
+                out["stale"] += 1
+                continue
+            self._last_ts[officer_id] = ts
+            officer_index.upsert(officer_id, p["lat"], p["lon"])
+            self._pending[officer_id] = (p["lat"], p["lon"], ts)
+            if self.track:
+                kept = self._last_track.get(officer_id)
+                if kept is None or ts - kept >= timedelta(seconds=self.track_min_s):
+                    self._last_track[officer_id] = ts
+                    self._tracks.append({"officer_id": officer_id, "ts": ts, "lat": p["lat"], "lon": p["lon"]})
+            out["accepted"] += 1
+
+        self.pings += len(pings)
+        self.stale += out["stale"]
+        self.unknown += out["unknown"]
+        return out
+
+    # --- flushing ---
+
+    async def flush(self) -> int:
+        """Write the newest pending position of each officer (and kept track points); returns officers updated."""
+        async with self._flush_lock:
+            if not self._pending and not self._tracks:
+                return 0
+            pending, self._pending = self._pending, {}
+            tracks, self._tracks = self._tracks, []
+            try:
+                async with AsyncSessionLocal() as db:
+                    if pending:
+                        # ORM bulk UPDATE by primary key: one executemany for the whole batch
+                        await db.execute(update(Officer), [
+                            {"id": oid, "last_lat": lat, "last_lon": lon, "last_seen_at": ts}
+                            for oid, (lat, lon, ts) in pending.items()
+                        ])
+                    if tracks:
+                        await db.execute(insert(OfficerTrack).prefix_with("OR IGNORE", dialect="sqlite"), tracks)
+                    await db.commit()
+            except Exception:
+                logger.exception("location flush failed; retrying on the next tick")
+                for oid, value in pending.items():
+                    # keep anything newer that arrived while the write was failing
+                    if oid not in self._pending or self._pending[oid][2] < value[2]:
+                        self._pending[oid] = value
+                self._tracks[:0] = tracks
+                return 0
+            self.flushes += 1
+            self.rows_written += len(pending)
+            self.track_rows += len(tracks)
+            return len(pending)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_s)
+            await self.flush()
+
+    async def start(self):
+        if self._task is None:
+            self._flush_lock = asyncio.Lock()  # bound to the serving loop
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pings": self.pings,
+            "stale": self.stale,
+            "unknown": self.unknown,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "track": self.track,
+            "track_rows": self.track_rows,
+        }
+
+
+location_tracker = LocationTracker(
+    flush_s=settings.LOCATION_FLUSH_S,
+    track=settings.LOCATION_TRACK,
+    track_min_s=settings.LOCATION_TRACK_MIN_S,
+)
@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Set
+
+_RANGE_OPS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _is_num(value: Any) -> bool:
+    # bools are stored as 0/1, so {"flag": true} hits the numeric index
+    return isinstance(value, (int, float))
+
+
+class MetadataIndex:
+    """
+    Document metadata in SQLite, one row per (doc_id, key) plus a multi-value
+    table for list fields such as video tags. A `where` filter is answered
+    from the (key, value) indexes as a set of doc ids, so the vector and BM25
+    searches only look at those documents.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS meta_docs (doc_id TEXT PRIMARY KEY);
+                CREATE TABLE IF NOT EXISTS meta_values (
+                  doc_id TEXT NOT NULL, key TEXT NOT NULL, value_text TEXT, value_num REAL,
+                  PRIMARY KEY (doc_id, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_meta_values_text ON meta_values (key, value_text, doc_id);
+                CREATE INDEX IF NOT EXISTS ix_meta_values_num ON meta_values (key, value_num, doc_id);
+                CREATE TABLE IF NOT EXISTS meta_multi (
+                  key TEXT NOT NULL, value TEXT NOT NULL, doc_id TEXT NOT NULL,
+                  PRIMARY KEY (key, value, doc_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_meta_multi_doc ON meta_multi (doc_id);
+                CREATE TABLE IF NOT EXISTS meta_state (key TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+            self._db = db
+        return self._db
+
+    # --- writes ---
+
+    def put_many(self, docs: Iterable[tuple[str, Dict[str, Any]]], overwrite: bool = True):
+        """Replace the stored metadata of each (doc_id, metadata); overwrite=False only adds new doc ids."""
+        docs = list(docs)
+        if not docs:
+            return
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute("BEGIN")
+                if not overwrite:
+                    docs = [(d, m) for d, m in docs if not db.execute(
+                        "SELECT 1 FROM meta_docs WHERE doc_id = ?", (d,)
+                    ).fetchone()]
+                self._write(db, docs)
+
+    @staticmethod
+    def _write(db: sqlite3.Connection, docs: list):
+        scalars, multi = [], []
+        for doc_id, meta in docs:
+            for key, value in meta.items():
+                if isinstance(value, (list, tuple, set)):
+                    multi.extend((key, str(v), doc_id) for v in value if v is not None)
+                elif value is None:
+                    continue
+                elif _is_num(value):
+                    scalars.append((doc_id, key, None, float(value)))
+                else:
+                    scalars.append((doc_id, key, str(value), None))
+
+        ids = [(d,) for d, _ in docs]
+        db.executemany("INSERT OR IGNORE INTO meta_docs (doc_id) VALUES (?)", ids)
+        db.executemany("DELETE FROM meta_values WHERE doc_id = ?", ids)
+        db.executemany("DELETE FROM meta_multi WHERE doc_id = ?", ids)
+        db.executemany("INSERT OR REPLACE INTO meta_values VALUES (?, ?, ?, ?)", scalars)
+        db.executemany("INSERT OR IGNORE INTO meta_multi VALUES (?, ?, ?)", multi)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn().execute("SELECT COUNT(*) FROM meta_docs").fetchone()[0]
+
+    # --- state ---
+
+    def get_state(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn().execute("SELECT value FROM meta_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str):
+        with self._lock:
+            self._conn().execute("INSERT OR REPLACE INTO meta_state VALUES (?, ?)", (key, value))
+
+    # --- filters ---
+
+    def resolve(self, where: Dict[str, Any]) -> Set[str] | None:
+        """
+        Doc ids matching a Chroma-style where, or None if it uses an operator
+        or a key not handled here (e.g. the per-chunk chunk_index).
+        """
+        try:
+            with self._lock:
+                return self._resolve(self._conn(), where)
+        except _Unsupported:
+            return None
+
+    def _resolve(self, db: sqlite3.Connection, where: Dict[str, Any]) -> Set[str]:
+        result: Set[str] | None = None
+        for key, cond in where.items():
+            if key == "$and":
+                ids = self._intersect(self._resolve(db, c) for c in cond)
+            elif key == "$or":
+                ids = set().union(*(self._resolve(db, c) for c in cond))
+            else:
+                if not isinstance(cond, dict):
+                    cond = {"$eq": cond}
+                ids = self._intersect(self._field(db, key, op, arg) for op, arg in cond.items())
+            result = ids if result is None else result & ids
+        return result if result is not None else self._all(db)
+
+    @staticmethod
+    def _intersect(sets: Iterable[Set[str]]) -> Set[str]:
+        out: Set[str] | None = None
+        for s in sets:
+            out = s if out is None else out & s
+        return out or set()
+
+    def _all(self, db: sqlite3.Connection) -> Set[str]:
+        return {r[0] for r in db.execute("SELECT doc_id FROM meta_docs")}
+
+    @staticmethod
+    def _known(db: sqlite3.Connection, key: str) -> bool:
+        return bool(
+            db.execute("SELECT 1 FROM meta_values WHERE key = ? LIMIT 1", (key,)).fetchone()
+            or db.execute("SELECT 1 FROM meta_multi WHERE key = ? LIMIT 1", (key,)).fetchone()
+        )
+
+    def _eq(self, db: sqlite3.Connection, key: str, value: Any) -> Set[str]:
+        if key == "doc_id":
+            return {r[0] for r in db.execute("SELECT doc_id FROM meta_docs WHERE doc_id = ?", (str(value),))}
+        if _is_num(value):
+            rows = db.execute("SELECT doc_id FROM meta_values WHERE key = ? AND value_num = ?", (key, float(value)))
+        else:
+            rows = db.execute("SELECT doc_id FROM meta_values WHERE key = ? AND value_text = ?", (key, str(value)))
+        ids = {r[0] for r in rows}
+        # equality against a list field means "list contains value"
+        ids.update(r[0] for r in db.execute(
+            "SELECT doc_id FROM meta_multi WHERE key = ? AND value = ?", (key, str(value))
+        ))
+        return ids
+
+    def _field(self, db: sqlite3.Connection, key: str, op: str, arg: Any) -> Set[str]:
+        if key != "doc_id" and not self._known(db, key):
+            # chunk-level keys and keys no indexed document has: Chroma still answers those
+            raise _Unsupported(key)
+        if op in ("$eq", "$contains"):
+            return self._eq(db, key, arg)
+        if op == "$in":
+            return set().union(*(self._eq(db, key, v) for v in arg)) if arg else set()
+        if op == "$ne":
+            return self._all(db) - self._eq(db, key, arg)
+        if op == "$nin":
+            return self._all(db) - set().union(*(self._eq(db, key, v) for v in arg))
+        if op in _RANGE_OPS and _is_num(arg) and key != "doc_id":
+            rows = db.execute(
+                f"SELECT doc_id FROM meta_values WHERE key = ? AND value_num {_RANGE_OPS[op]} ?", (key, float(arg))
+            )
+            return {r[0] for r in rows}
+        raise _Unsupported(op)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._conn()
+            docs = db.execute("SELECT COUNT(*) FROM meta_docs").fetchone()[0]
+            keys = db.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT key FROM meta_values UNION SELECT DISTINCT key FROM meta_multi)"
+            ).fetchone()[0]
+        return {"docs": docs, "keys": keys}
+
+
+class _Unsupported(Exception):
+    pass
@@ -0,0 +1,242 @@
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from ..config import settings
+from ..models import Officer
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1 = a
+    lat2, lon2 = b
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    x = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, x)))
+
+
+def haversine_matrix_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Pairwise great-circle distances: rows are points (lat1, lon1), columns (lat2, lon2)."""
+    p1 = np.radians(np.asarray(lat1, dtype=np.float64))[:, None]
+    l1 = np.radians(np.asarray(lon1, dtype=np.float64))[:, None]
+    p2 = np.radians(np.asarray(lat2, dtype=np.float64))[None, :]
+    l2 = np.radians(np.asarray(lon2, dtype=np.float64))[None, :]
+    x = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin((l2 - l1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(x, 0.0, 1.0)))
+
+
+class OfficerIndex:
+    """
+    In-memory grid index of officer positions.
+
+    Positions are bucketed into fixed-size lat/lon cells, so a radius query only
+    touches the handful of cells overlapping the search circle instead of every
+    officer row. The index is filled lazily from the DB on first use and kept in
+    sync through ORM events on Officer, applied when the session commits (see
+    bottom of module).
+    """
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._lock = threading.RLock()
+        self._positions: Dict[str, Tuple[float, float]] = {}
+        self._cells: Dict[Tuple[int, int], set[str]] = {}
+        self._loaded = False
+        self._version = 0
+        self._snapshot: Tuple[int, List[str], np.ndarray, np.ndarray] | None = None
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    # --- maintenance ---
+
+    def ensure_loaded(self, db: Session):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.reload(db)
+
+    async def aensure_loaded(self, db: AsyncSession):
+        if not self._loaded:
+            await db.run_sync(self.ensure_loaded)
+
+    def reload(self, db: Session):
+        rows = db.query(Officer.id, Officer.last_lat, Officer.last_lon).all()
+        with self._lock:
+            self._positions.clear()
+            self._cells.clear()
+            for officer_id, lat, lon in rows:
+                self.upsert(officer_id, lat, lon)
+            self._loaded = True
+            # even when nothing was inserted: the positions that were cleared are gone
+            self._version += 1
+
+    def upsert(self, officer_id: str, lat: float | None, lon: float | None):
+        with self._lock:
+            self.remove(officer_id)
+            if lat is None or lon is None:
+                return
+            self._positions[officer_id] = (lat, lon)
+            self._version += 1
+            self._cells.setdefault(self._cell(lat, lon), set()).add(officer_id)
+
+    def remove(self, officer_id: str):
+        with self._lock:
+            pos = self._positions.pop(officer_id, None)
+            if pos is None:
+                return
+            self._version += 1
+            key = self._cell(*pos)
+            bucket = self._cells.get(key)
+            if bucket is not None:
+                bucket.discard(officer_id)
+                if not bucket:
+                    del self._cells[key]
+
+    def clear(self):
+        with self._lock:
+            self._positions.clear()
+            self._cells.clear()
+            self._loaded = False
+            self._version += 1
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def position(self, officer_id: str) -> Optional[Tuple[float, float]]:
+        return self._positions.get(officer_id)
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(ids, lats, lons) arrays for vectorized callers; rebuilt only after changes."""
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or snap[0] != self._version:
+                ids = list(self._positions)
+                coords = np.array([self._positions[i] for i in ids], dtype=np.float64).reshape(-1, 2)
+                snap = (self._version, ids, coords[:, 0], coords[:, 1])
+                self._snapshot = snap
+        return snap[1], snap[2], snap[3]
+
+    # --- queries ---
+
+    def _candidate_ids(self, lat: float, lon: float, radius_km: float):
+        if radius_km >= HALF_CIRCUMFERENCE_KM:
+            return list(self._positions)
+
+        dlat_deg = radius_km / KM_PER_DEG_LAT
+        # widest longitude span of the circle is at the latitude nearest a pole
+        max_abs_lat = min(90.0, abs(lat) + dlat_deg)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if max_abs_lat >= 89.0 or cos_lat * 180.0 * KM_PER_DEG_LAT <= radius_km:
+            dlon_deg = 180.0
+        else:
+            dlon_deg = radius_km / (KM_PER_DEG_LAT * cos_lat)
+
+        lat_lo, lon_lo = self._cell(lat - dlat_deg, lon - dlon_deg)
+        lat_hi, lon_hi = self._cell(lat + dlat_deg, lon + dlon_deg)
+        n_cells = (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1)
+        if n_cells > len(self._cells):
+            # sparse index or huge radius: walking occupied cells is cheaper
+            return list(self._positions)
+
+        out: List[str] = []
+        wrap = int(round(360.0 / self.cell_deg))
+        for ci in range(lat_lo, lat_hi + 1):
+            for cj in range(lon_lo, lon_hi + 1):
+                bucket = self._cells.get((ci, cj))
+                if bucket is None and dlon_deg < 180.0:
+                    # antimeridian: cells past +/-180 live on the other side
+                    bucket = self._cells.get((ci, cj - wrap)) or self._cells.get((ci, cj + wrap))
+                if bucket:
+                    out.extend(bucket)
+        return out
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """All officers within radius_km, sorted by distance (km)."""
+        with self._lock:
+            hits = []
+            for officer_id in self._candidate_ids(lat, lon, radius_km):
+                dist = haversine_km((lat, lon), self._positions[officer_id])
+                if dist <= radius_km:
+                    hits.append((officer_id, dist))
+        hits.sort(key=lambda h: h[1])
+        return hits
+
+    def k_nearest(self, lat: float, lon: float, k: int, max_km: float | None = None) -> List[Tuple[str, float]]:
+        """Up to k nearest officers (optionally capped at max_km), sorted by distance (km)."""
+        if k <= 0:
+            return []
+        limit = HALF_CIRCUMFERENCE_KM if max_km is None else max_km
+        radius = min(limit, self.cell_deg * KM_PER_DEG_LAT)
+        while True:
+            hits = self.within_radius(lat, lon, radius)
+            if len(hits) >= k or radius >= limit:
+                return hits[:k]
+            radius = min(limit, radius * 2)
+
+    def nearest(self, lat: float, lon: float, max_km: float) -> Optional[Tuple[str, float]]:
+        hits = self.k_nearest(lat, lon, 1, max_km=max_km)
+        return hits[0] if hits else None
+
+
+officer_index = OfficerIndex(cell_deg=settings.OFFICER_INDEX_CELL_DEG)
+
+
+_PENDING_KEY = "officer_index_pending"
+
+
+def _pending(target: Officer) -> list | None:
+    session = object_session(target)
+    return session.info.setdefault(_PENDING_KEY, []) if session is not None else None
+
+
+# Flush-time events only buffer the change on the session; it reaches the index
+# on commit and is dropped on rollback, so an aborted transaction leaves no
+# phantom positions behind.
+@event.listens_for(Officer, "after_insert")
+@event.listens_for(Officer, "after_update")
+def _officer_saved(mapper, connection, target: Officer):
+    pending = _pending(target)
+    if pending is None:
+        officer_index.upsert(target.id, target.last_lat, target.last_lon)
+    else:
+        pending.append((target.id, target.last_lat, target.last_lon, False))
+
+
+@event.listens_for(Officer, "after_delete")
+def _officer_deleted(mapper, connection, target: Officer):
+    pending = _pending(target)
+    if pending is None:
+        officer_index.remove(target.id)
+    else:
+        pending.append((target.id, None, None, True))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session):
+    for officer_id, lat, lon, deleted in session.info.pop(_PENDING_KEY, ()):
+        if deleted:
+            officer_index.remove(officer_id)
+        else:
+            officer_index.upsert(officer_id, lat, lon)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
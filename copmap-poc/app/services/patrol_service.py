@@ -1,10 +1,20 @@
+import json
 import uuid
 from datetime import datetime
+from typing import Any, Callable, Dict, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..models import Patrol, Alert
+from ..db import AsyncSessionLocal
+from ..config import settings
+from ..models import Job, Patrol, Alert
+from ..ws import manager, officer_topic
+from .job_queue import job_queue
 from .rag_service import rag_service
 from .llm_service import llm_service
 
+SUMMARY_JOB = "patrol_summary"
+
 
 def start_patrol(db: Session, officer_id: str, start_lat: float | None, start_lon: float | None, location_text: str | None) -> Patrol:
     pid = f"patrol_{uuid.uuid4().hex[:10]}"
@@ -22,20 +32,69 @@ def start_patrol(db: Session, officer_id: str, start_lat: float | None, start_lo
     return row
 
 
-async def end_patrol_and_summarize(db: Session, patrol_id: str, notes: str | None) -> Patrol:
-    patrol = db.get(Patrol, patrol_id)
+async def end_patrol(db: AsyncSession, patrol_id: str, notes: str | None) -> tuple[Patrol, Job]:
+    """Close the patrol and queue its summary; the officer is told over WebSocket when it is ready."""
+    patrol = await db.get(Patrol, patrol_id)
     if not patrol:
         raise ValueError("Patrol not found")
 
     patrol.end_time = datetime.utcnow()
+    patrol.notes = notes
+    db.add(patrol)
+    job = await job_queue.enqueue(
+        db,
+        SUMMARY_JOB,
+        {"patrol_id": patrol.id},
+        notify_topic=officer_topic(patrol.officer_id),
+    )
+    return patrol, job
+
+
+@job_queue.register(SUMMARY_JOB)
+async def _run_summary_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    async with AsyncSessionLocal() as db:
+        patrol = await db.get(Patrol, payload["patrol_id"])
+        if not patrol:
+            raise ValueError("Patrol not found")
+        on_token = None
+        if settings.LLM_STREAM:
+            topic = officer_topic(patrol.officer_id)
+
+            def on_token(token: str):
+                manager.publish([topic], {"event": "summary_token", "patrol_id": patrol.id, "token": token})
+
+        patrol = await summarize_patrol(db, patrol, on_token)
+        return {"patrol_id": patrol.id, "summary": patrol.summary, "risk_score": patrol.risk_score}
+
+
+def rag_context_record(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """What is stored on the patrol: enough to show and audit the context the summary used."""
+    return [
+        {
+            "doc_id": h.get("doc_id"),
+            "distance": h.get("distance"),
+            "score": h.get("score"),
+            "content": h["content"],
+        }
+        for h in hits
+    ]
+
+
+def load_rag_context(patrol: Patrol) -> List[Dict[str, Any]]:
+    return json.loads(patrol.rag_context_json) if patrol.rag_context_json else []
+
+
+async def summarize_patrol(db: AsyncSession, patrol: Patrol, on_token: Callable[[str], None] | None = None) -> Patrol:
+    """(Re)generate the summary and store it together with the RAG context it was built from."""
+    notes = patrol.notes
 
     # For PoC: pull alerts assigned to this officer during patrol window
-    q = db.query(Alert).filter(Alert.assigned_officer_id == patrol.officer_id)
+    q = select(Alert).where(Alert.assigned_officer_id == patrol.officer_id)
     if patrol.start_time:
-        q = q.filter(Alert.created_at >= patrol.start_time)
+        q = q.where(Alert.created_at >= patrol.start_time)
     if patrol.end_time:
-        q = q.filter(Alert.created_at <= patrol.end_time)
-    alerts = q.order_by(Alert.created_at.desc()).all()
+        q = q.where(Alert.created_at <= patrol.end_time)
+    alerts = (await db.execute(q.order_by(Alert.created_at.desc()))).scalars().all()
 
     alerts_payload = []
     for a in alerts:
@@ -47,10 +106,11 @@ async def end_patrol_and_summarize(db: Session, patrol_id: str, notes: str | Non
             "lat": a.lat,
             "lon": a.lon,
             "confidence": a.confidence,
+            "created_at": a.created_at.isoformat() if a.created_at else None,
         })
 
     query_text = patrol.location_text or notes or "patrol summary"
-    rag_hits = rag_service.query(query_text=query_text, k=4)
+    rag_hits = await rag_service.aquery(query_text=query_text, k=4)
     rag_context = [h["content"] for h in rag_hits]
 
     llm_out = await llm_service.generate_patrol_summary(
@@ -64,14 +124,16 @@ async def end_patrol_and_summarize(db: Session, patrol_id: str, notes: str | Non
         alerts=alerts_payload,
         notes=notes,
         rag_context=rag_context,
+        on_token=on_token,
     )
 
     # store
     patrol.summary = llm_out["text"]
+    patrol.generated_with = llm_out.get("generated_with")
+    patrol.rag_context_json = json.dumps(rag_context_record(rag_hits))
     # reuse llm risk heuristic for now
     patrol.risk_score = llm_service._risk_score(alerts_payload)  # type: ignore
 
     db.add(patrol)
-    db.commit()
-    db.refresh(patrol)
+    await db.commit()
     return patrol
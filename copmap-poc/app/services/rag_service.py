@@ -1,83 +1,508 @@
+import asyncio
+import json
+import logging
 import os
-from typing import Any, Dict, List
-
-import chromadb
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List
 
 from ..config import settings
+from .chunking import iter_chunks
+from .embedding_cache import EmbeddingCache, content_hash
+from .embedding_executor import EmbeddingExecutor
+from .lexical_index import LexicalIndex
+from .metadata_index import MetadataIndex
+from .query_cache import QueryCache
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+QUERY_MODES = ("vector", "lexical", "hybrid")
+
+# per-chunk bookkeeping keys, not shown in query results
+_CHUNK_KEYS = ("chunk_index", "content_hash")
+# list metadata that _sanitize_metadata joins with "," for Chroma
+_LIST_KEYS = ("tags",)
+
+
+def _batched(items: Iterable[Any], n: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while batch := list(islice(it, n)):
+        yield batch
 
 
 class RagService:
+    """
+    Chroma + SentenceTransformer retrieval. The model and the Chroma client are
+    created on first use (or by warmup() at startup), not at import time, so
+    importing the app and serving /health stay fast.
+    """
+
     def __init__(self):
-        os.makedirs(settings.CHROMA_DIR, exist_ok=True)
+        self._embedder: "SentenceTransformer | None" = None
+        self._client = None
+        self._collection = None
+        self._embedder_lock = threading.Lock()
+        self._collection_lock = threading.Lock()
+
+        self.state = "lazy"  # lazy|loading|ready|error
+        self.error: str | None = None
+        self.load_seconds: float | None = None
 
-        self.client = chromadb.PersistentClient(
-            path=settings.CHROMA_DIR
+        self.embedding_cache = EmbeddingCache(
+            model_name=settings.EMBEDDING_MODEL,
+            max_items=settings.EMBEDDING_CACHE_SIZE,
+            path=settings.EMBEDDING_CACHE_PATH,
         )
 
-        # Explicit embedding model (recommended for Chroma 1.x)
-        self.embedder = SentenceTransformer(settings.EMBEDDING_MODEL)
+        # bumped by every write to the collection; part of the query cache key
+        self.version = 0
+        self.query_cache = QueryCache(
+            max_items=settings.RAG_QUERY_CACHE_SIZE,
+            ttl_s=settings.RAG_QUERY_CACHE_TTL_S,
+        )
+
+        index_path = settings.RAG_INDEX_PATH or os.path.join(settings.DATA_DIR, "rag_index.db")
+        self.lexical = LexicalIndex(index_path)
+        # per-document metadata; filters resolve to candidate doc ids here before any search
+        self.metadata = MetadataIndex(index_path)
+        self._metadata_backfilled = False
 
-        self.collection = self.client.get_or_create_collection(
-            name=settings.CHROMA_COLLECTION
+        # async callers (patrol end, /rag/query) embed here instead of on the event loop
+        self.executor = EmbeddingExecutor(
+            encode=self._encode,
+            kind=settings.EMBED_EXECUTOR,
+            workers=settings.EMBED_WORKERS,
+            window_ms=settings.EMBED_BATCH_WINDOW_MS,
+            max_batch=settings.EMBED_MAX_BATCH,
+            model_name=settings.EMBEDDING_MODEL,
+            batch_size=settings.EMBED_BATCH_SIZE,
         )
 
-    def _embed(self, texts: List[str]) -> List[List[float]]:
+    @property
+    def embedder(self) -> "SentenceTransformer":
+        if self._embedder is None:
+            with self._embedder_lock:
+                if self._embedder is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    # Explicit embedding model (recommended for Chroma 1.x)
+                    self._embedder = SentenceTransformer(settings.EMBEDDING_MODEL)
+        return self._embedder
+
+    @property
+    def client(self):
+        self._ensure_collection()
+        return self._client
+
+    @property
+    def collection(self):
+        self._ensure_collection()
+        return self._collection
+
+    def _ensure_collection(self):
+        if self._collection is not None:
+            return
+        with self._collection_lock:
+            if self._collection is None:
+                import chromadb
+
+                os.makedirs(settings.CHROMA_DIR, exist_ok=True)
+                self._client = chromadb.PersistentClient(
+                    path=settings.CHROMA_DIR
+                )
+                self._collection = self._client.get_or_create_collection(
+                    name=settings.CHROMA_COLLECTION
+                )
+
+    @property
+    def loaded(self) -> bool:
+        return self._embedder is not None and self._collection is not None
+
+    def warmup(self):
+        """Load the model and collection and run one encode (startup thread)."""
+        self.state = "loading"
+        t0 = time.perf_counter()
+        try:
+            self._ensure_collection()
+            self.embedder.encode(["warmup"], normalize_embeddings=True)
+        except Exception as e:
+            self.state, self.error = "error", f"{type(e).__name__}: {e}"
+            logger.exception("RAG warmup failed")
+            return
+        self.load_seconds = time.perf_counter() - t0
+        self.state = "ready"
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
         return self.embedder.encode(
             texts,
+            batch_size=settings.EMBED_BATCH_SIZE,
             normalize_embeddings=True
         ).tolist()
 
+    def _cache_lookup(self, texts: List[str]):
+        keys = [self.embedding_cache.key(t) for t in texts]
+        found = self.embedding_cache.get_many(keys)
+        missing: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in found:
+                missing.setdefault(k, t)
+        return keys, found, missing
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        # only texts never seen before reach the model, in one batched encode
+        keys, found, missing = self._cache_lookup(texts)
+        if missing:
+            fresh = dict(zip(missing.keys(), self._encode(list(missing.values()))))
+            self.embedding_cache.put_many(fresh)
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    async def _aembed(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._cache_lookup(texts)
+        if missing:
+            fresh = dict(zip(missing.keys(), await self.executor.embed(list(missing.values()))))
+            self.embedding_cache.put_many(fresh)
+            found.update(fresh)
+        return [found[k] for k in keys]
+
     def _sanitize_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         # Chroma metadata values must be scalar types (or None), not nested objects.
+        # Lists stay filterable as lists in the metadata index.
         clean: Dict[str, Any] = {}
         for key, value in metadata.items():
             if isinstance(value, (str, int, float, bool)) or value is None:
                 clean[key] = value
+            elif isinstance(value, (list, tuple)):
+                clean[key] = ",".join(str(v) for v in value)
             else:
                 clean[key] = str(value)
         return clean
 
-    def ingest(self, doc_id: str, content: str, metadata: Dict[str, Any]):
-        embeddings = self._embed([content])
-        clean_metadata = self._sanitize_metadata(metadata)
+    def ingest(self, doc_id: str, content: str, metadata: Dict[str, Any]) -> bool:
+        """Returns False when the stored document is already identical (nothing re-embedded)."""
+        out = self.ingest_many([{"doc_id": doc_id, "content": content, "metadata": metadata}])
+        return out["ingested"] > 0
 
-        self.collection.upsert(
-            ids=[doc_id],
-            documents=[content],
-            metadatas=[clean_metadata],
-            embeddings=embeddings,
-        )
+    def ingest_many(self, docs: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Chunk, embed and upsert documents ({doc_id, content, metadata}). Documents
+        whose chunks all match what is stored are skipped.
+        """
+        # last write wins for duplicate ids
+        by_id = {d["doc_id"]: d for d in docs}
+        changed: set[str] = set()
+
+        def records():
+            for doc_id, d in by_id.items():
+                yield from self._iter_doc_chunks(doc_id, [d["content"]], d.get("metadata") or {})
+
+        # before the chunk write bumps the version: a filtered query cached under the
+        # new version must already see the new metadata
+        self.metadata.put_many((doc_id, d.get("metadata") or {}) for doc_id, d in by_id.items())
+        stats = self._write_chunks(records(), changed)
+        self._delete_stale_chunks(list(by_id), stats.pop("ids"), changed)
+        return {"ingested": len(changed), "skipped": len(by_id) - len(changed)}
+
+    def ingest_stream(
+        self,
+        doc_id: str,
+        pieces: Iterable[str],
+        metadata: Dict[str, Any],
+        progress: Callable[[Dict[str, int]], None] | None = None,
+    ) -> Dict[str, int]:
+        """
+        Ingest one (possibly huge) document from an iterable of text pieces, e.g.
+        an open file. Text is chunked by a generator and embedded/upserted one
+        batch at a time, so the whole document is never held in memory.
+        """
+        changed: set[str] = set()
+        self.metadata.put_many([(doc_id, metadata)])
+        stats = self._write_chunks(self._iter_doc_chunks(doc_id, pieces, metadata), changed, progress)
+        stats["deleted"] = self._delete_stale_chunks([doc_id], stats.pop("ids"), changed)
+        return stats
+
+    def _iter_doc_chunks(self, doc_id: str, pieces: Iterable[str], metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        base = self._sanitize_metadata(dict(metadata))
+        base["doc_id"] = doc_id
+        seen: Dict[str, int] = {}
+        chunks = iter_chunks(pieces, settings.RAG_CHUNK_WORDS, settings.RAG_CHUNK_OVERLAP_WORDS)
+        for i, text in enumerate(chunks):
+            h = content_hash(text)
+            # content-derived ids: an unchanged chunk keeps its id (and vector) wherever it moves
+            chunk_id = f"{doc_id}#{h[:16]}"
+            dup = seen.get(chunk_id, 0)
+            seen[chunk_id] = dup + 1
+            if dup:
+                chunk_id = f"{chunk_id}-{dup}"
+            yield {
+                "id": chunk_id,
+                "doc_id": doc_id,
+                "content": text,
+                "metadata": {**base, "chunk_index": i, "content_hash": h},
+            }
+
+    def _write_chunks(
+        self,
+        records: Iterable[Dict[str, Any]],
+        changed: set,
+        progress: Callable[[Dict[str, int]], None] | None = None,
+    ) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"chunks": 0, "embedded": 0, "updated": 0, "ids": set()}
+
+        for batch in _batched(records, settings.RAG_UPSERT_BATCH):
+            ids = [r["id"] for r in batch]
+            stored = self.collection.get(ids=ids, include=["metadatas"])
+            stored_meta = dict(zip(stored.get("ids") or [], stored.get("metadatas") or []))
+
+            new, moved, same = [], [], []
+            for r in batch:
+                if r["id"] not in stored_meta:
+                    new.append(r)
+                elif stored_meta[r["id"]] != r["metadata"]:
+                    moved.append(r)
+                else:
+                    same.append(r)
+            # chunks missing from the BM25 index (e.g. index created after the collection)
+            kept = same + moved
+            known = self.lexical.known([r["id"] for r in kept]) if kept else set()
+            unindexed = [r for r in kept if r["id"] not in known]
+
+            if new:
+                self.collection.upsert(
+                    ids=[r["id"] for r in new],
+                    documents=[r["content"] for r in new],
+                    metadatas=[r["metadata"] for r in new],
+                    embeddings=self._embed([r["content"] for r in new]),
+                )
+                self.lexical.upsert(new + unindexed)
+            elif unindexed:
+                self.lexical.upsert(unindexed)
+            if moved:
+                # same text, new position/metadata: no re-embedding, and no re-tokenizing for BM25
+                self.collection.update(ids=[r["id"] for r in moved], metadatas=[r["metadata"] for r in moved])
+                indexed = [r for r in moved if r["id"] in known]
+                self.lexical.update_metadata([r["id"] for r in indexed], [r["metadata"] for r in indexed])
+
+            if new or moved or unindexed:
+                self.version += 1
+            changed.update(r["doc_id"] for r in new + moved)
+            stats["ids"].update(ids)
+            stats["chunks"] += len(batch)
+            stats["embedded"] += len(new)
+            stats["updated"] += len(moved)
+            if progress:
+                progress({k: v for k, v in stats.items() if k != "ids"})
+
+        return stats
+
+    def _delete_stale_chunks(self, doc_ids: List[str], keep_ids: set, changed: set) -> int:
+        """Drop chunks of doc_ids that were not written this time (plus pre-chunking whole-doc vectors)."""
+        deleted = 0
+        for batch in _batched(doc_ids, 100):
+            stored = self.collection.get(where={"doc_id": {"$in": batch}}, include=["metadatas"])
+            stale = [
+                (i, m.get("doc_id")) for i, m in zip(stored.get("ids") or [], stored.get("metadatas") or [])
+                if i not in keep_ids
+            ]
+            legacy = self.collection.get(ids=batch, include=[])
+            stale += [(i, i) for i in legacy.get("ids") or []]
+            if stale:
+                self.collection.delete(ids=[i for i, _ in stale])
+                self.lexical.delete([i for i, _ in stale])
+                self.version += 1
+                changed.update(d for _, d in stale)
+                deleted += len(stale)
+        return deleted
 
     def query(
         self,
         query_text: str,
         k: int = 4,
         where: Dict[str, Any] | None = None,
+        mode: str | None = None,
+    ) -> List[Dict[str, Any]]:
+        mode = self._mode(mode)
+        key = self._cache_key(query_text, k, where, mode)
+        hits = self.query_cache.get(key)
+        if hits is None:
+            # lexical lookups never touch the embedder
+            query_embedding = None if mode == "lexical" else self._embed([query_text])
+            hits = self._search(query_text, query_embedding, k, where, mode)
+            self.query_cache.put(key, hits)
+        return [dict(h) for h in hits]
+
+    async def aquery(
+        self,
+        query_text: str,
+        k: int = 4,
+        where: Dict[str, Any] | None = None,
+        mode: str | None = None,
     ) -> List[Dict[str, Any]]:
+        """query() for async callers: encode on the embedding executor, search in a thread."""
+        mode = self._mode(mode)
+        key = self._cache_key(query_text, k, where, mode)
+        hits = self.query_cache.get(key)
+        if hits is None:
+            query_embedding = None if mode == "lexical" else await self._aembed([query_text])
+            hits = await asyncio.to_thread(self._search, query_text, query_embedding, k, where, mode)
+            self.query_cache.put(key, hits)
+        return [dict(h) for h in hits]
 
-        query_embedding = self._embed([query_text])
+    def _cache_key(self, query_text: str, k: int, where: Dict[str, Any] | None, mode: str):
+        # the version is read before searching, so a concurrent ingest can only make the entry unreachable
+        return (" ".join(query_text.split()), k, json.dumps(where or {}, sort_keys=True, default=str), mode, self.version)
+
+    @staticmethod
+    def _mode(mode: str | None) -> str:
+        mode = (mode or settings.RAG_QUERY_MODE).lower()
+        if mode not in QUERY_MODES:
+            raise ValueError(f"Unknown RAG query mode: {mode}")
+        return mode
+
+    def _search(
+        self,
+        query_text: str,
+        query_embedding: List[List[float]] | None,
+        k: int,
+        where: Dict[str, Any] | None,
+        mode: str,
+    ) -> List[Dict[str, Any]]:
         where_filter = where or None
+        # several chunks of one document can match; over-fetch, then keep the best per document
+        n = k * settings.RAG_QUERY_FANOUT
+
+        candidates = self._candidates(where_filter) if where_filter else None
+        if candidates is not None:
+            if not candidates:
+                return []
+            where_filter = None
+
+        vector = lexical = None
+        if mode != "lexical":
+            if candidates is not None and len(candidates) <= settings.RAG_PREFILTER_EXACT_DOCS:
+                chunks = self._exact_chunks(query_embedding, n, candidates)
+            else:
+                cand_filter = {"doc_id": {"$in": sorted(candidates)}} if candidates is not None else None
+                chunks = self._vector_chunks(query_embedding, n, cand_filter or where_filter)
+            vector = self._merge_chunks(chunks)
+        if mode != "vector":
+            lexical = self._merge_chunks(self.lexical.search(query_text, n, where_filter, doc_ids=candidates))
+
+        if lexical is None:
+            return vector[:k]
+        if vector is None:
+            return lexical[:k]
+        return self._fuse(vector, lexical, k)
+
+    def _candidates(self, where: Dict[str, Any]) -> set | None:
+        """Doc ids matching `where` from the metadata index; None falls back to filtering in Chroma."""
+        if not self._metadata_backfilled:
+            self._backfill_metadata()
+        return self.metadata.resolve(where)
+
+    def _backfill_metadata(self):
+        # collections written before the metadata index existed: rebuild it once from Chroma.
+        # Tracked by a marker, not by an empty index: documents ingested after an upgrade
+        # but before the first filtered query would otherwise hide the older ones for good.
+        if self.metadata.get_state("backfilled") is None and self.collection.count():
+            docs: Dict[str, Dict[str, Any]] = {}
+            offset = 0
+            while True:
+                res = self.collection.get(include=["metadatas"], limit=1000, offset=offset)
+                if not res["ids"]:
+                    break
+                for chunk_id, m in zip(res["ids"], res["metadatas"]):
+                    m = dict(m or {})
+                    for key in _CHUNK_KEYS:
+                        m.pop(key, None)
+                    for key in _LIST_KEYS:
+                        if isinstance(m.get(key), str):
+                            m[key] = [v for v in m[key].split(",") if v]
+                    docs.setdefault(m.pop("doc_id", None) or chunk_id, m)
+                offset += len(res["ids"])
+            # documents already indexed by a newer ingest keep that metadata
+            self.metadata.put_many(docs.items(), overwrite=False)
+            logger.info("Backfilled metadata index from %d documents", len(docs))
+        self.metadata.set_state("backfilled", "1")
+        self._metadata_backfilled = True
+
+    def _exact_chunks(self, query_embedding: List[List[float]], n: int, doc_ids: set):
+        """Brute-force distances over every chunk of a small candidate set (no HNSW filter misses)."""
+        import numpy as np
 
+        res = self.collection.get(
+            where={"doc_id": {"$in": sorted(doc_ids)}},
+            include=["embeddings", "documents", "metadatas"],
+        )
+        if not len(res["ids"]):
+            return []
+        # squared L2, the same distance Chroma's default space reports
+        emb = np.asarray(res["embeddings"], dtype=np.float32)
+        dists = ((emb - np.asarray(query_embedding[0], dtype=np.float32)) ** 2).sum(axis=1)
+        order = np.argsort(dists)[:n]
+        return [
+            {"id": res["ids"][i], "content": res["documents"][i], "metadata": res["metadatas"][i], "distance": float(dists[i])}
+            for i in order
+        ]
+
+    def _vector_chunks(self, query_embedding: List[List[float]], n: int, where: Dict[str, Any] | None):
         res = self.collection.query(
             query_embeddings=query_embedding,
-            n_results=k,
-            where=where_filter,
+            n_results=n,
+            where=where,
             include=["documents", "metadatas", "distances"],
         )
 
+        ids = (res.get("ids") or [[]])[0]
         docs = (res.get("documents") or [[]])[0]
         metas = (res.get("metadatas") or [[]])[0]
         dists = (res.get("distances") or [[]])[0]
-
         return [
-            {
-                "content": d,
-                "metadata": m,
-                "distance": dist
-            }
-            for d, m, dist in zip(docs, metas, dists)
+            {"id": i, "content": d, "metadata": m, "distance": dist}
+            for i, d, m, dist in zip(ids, docs, metas, dists)
         ]
 
+    @staticmethod
+    def _merge_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Best-first chunk hits -> best-first document hits (the best chunk is the content)."""
+        best: Dict[str, Dict[str, Any]] = {}
+        for c in chunks:
+            m = dict(c["metadata"] or {})
+            doc_id = m.get("doc_id") or c.get("doc_id") or c["id"]
+            hit = best.get(doc_id)
+            if hit is None:
+                for key in _CHUNK_KEYS:
+                    m.pop(key, None)
+                hit = best[doc_id] = {"doc_id": doc_id, "content": c["content"], "metadata": m, "matched_chunks": 0}
+                if "distance" in c:
+                    hit["distance"] = c["distance"]
+                if "score" in c:
+                    hit["bm25"] = round(c["score"], 4)
+            hit["matched_chunks"] += 1
+        return list(best.values())
+
+    @staticmethod
+    def _fuse(vector: List[Dict[str, Any]], lexical: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """Reciprocal rank fusion: score = sum 1/(RRF_K + rank) over both rankings."""
+        fused: Dict[str, Dict[str, Any]] = {}
+        for ranking in (vector, lexical):
+            for rank, hit in enumerate(ranking, start=1):
+                cur = fused.get(hit["doc_id"])
+                if cur is None:
+                    cur = fused[hit["doc_id"]] = {**hit, "score": 0.0}
+                else:
+                    # keep the vector hit's content; pick up the lexical score
+                    cur.setdefault("bm25", hit.get("bm25"))
+                    cur["matched_chunks"] = max(cur["matched_chunks"], hit["matched_chunks"])
+                cur["score"] += 1.0 / (settings.RAG_RRF_K + rank)
+        ranked = sorted(fused.values(), key=lambda h: h["score"], reverse=True)[:k]
+        for h in ranked:
+            h["score"] = round(h["score"], 6)
+        return ranked
+
 
 rag_service = RagService()
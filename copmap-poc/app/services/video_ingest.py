@@ -0,0 +1,158 @@
+import glob
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from .rag_service import _batched, rag_service
+
+logger = logging.getLogger(__name__)
+
+# fields copied verbatim into Chroma metadata (scalars only)
+_SCALAR_FIELDS = (
+    "video_id", "video_name", "location", "officer_id", "timestamp",
+    "video_type", "duration_seconds", "file_size_mb", "status",
+)
+
+
+def render_video_text(video: Dict[str, Any]) -> str:
+    """Text that gets embedded and BM25-indexed for one clip."""
+    lines = [
+        f"Video ID: {video.get('video_id', '')}",
+        f"Title: {video.get('video_name', '')}",
+        f"Description: {video.get('description', '')}",
+        f"Recording Time: {video.get('timestamp', '')}",
+        f"Location: {video.get('location', '')}",
+        f"Officer ID: {video.get('officer_id', '')}",
+    ]
+    if video.get("tags"):
+        lines.append("Tags: " + ", ".join(str(t) for t in video["tags"]))
+    return "\n".join(lines)
+
+
+def video_metadata(video: Dict[str, Any]) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {"doc_type": "video"}
+    for field in _SCALAR_FIELDS:
+        value = video.get(field)
+        if isinstance(value, (str, int, float, bool)):
+            meta[field] = value
+    # numeric time so clips can be range-filtered ({"recorded_at": {"$gte": ...}})
+    try:
+        recorded = datetime.fromisoformat(str(video["timestamp"]))
+    except (KeyError, ValueError):
+        pass
+    else:
+        if recorded.tzinfo is None:
+            # naive timestamps are UTC, not the server's local time
+            recorded = recorded.replace(tzinfo=timezone.utc)
+        meta["recorded_at"] = int(recorded.timestamp())
+    tags = [str(t) for t in video.get("tags") or []]
+    if tags:
+        # a list: the metadata index filters it with {"tags": {"$contains": ...}}
+        meta["tags"] = tags
+    return meta
+
+
+def iter_video_records(source: str) -> Iterator[Dict[str, Any]]:
+    """
+    Video metadata dicts from a directory of *.json / *.jsonl files (sorted by
+    name, so positions are stable across runs) or from a single JSONL file.
+    """
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.json")) + glob.glob(os.path.join(source, "*.jsonl")))
+    else:
+        paths = [source]
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                data = json.load(f)
+                yield from (data if isinstance(data, list) else [data])
+            else:
+                yield from iter_jsonl(f)
+
+
+def iter_jsonl(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # keep positions aligned with the input; counted as failed downstream
+            yield {}
+
+
+class Checkpoint:
+    """Number of records of a source already ingested, written atomically after every batch."""
+
+    def __init__(self, path: str | None, source: str):
+        self.path = path
+        self.source = os.path.abspath(source) if source else ""
+        self.position = 0
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("source") == self.source:
+                self.position = int(state.get("position", 0))
+
+    def save(self, position: int, stats: Dict[str, int]):
+        self.position = position
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "position": position, "stats": stats}, f)
+        os.replace(tmp, self.path)
+
+
+def _to_doc(video: Dict[str, Any]) -> Dict[str, Any] | None:
+    video_id = video.get("video_id") or video.get("id")
+    if not video_id:
+        return None
+    video = {**video, "video_id": str(video_id)}
+    return {"doc_id": str(video_id), "content": render_video_text(video), "metadata": video_metadata(video)}
+
+
+def ingest_video_batch(videos: List[Dict[str, Any]]) -> Dict[str, int]:
+    docs, failed = [], 0
+    for v in videos:
+        doc = _to_doc(v) if isinstance(v, dict) else None
+        if doc is None:
+            failed += 1
+        else:
+            docs.append(doc)
+    out = rag_service.ingest_many(docs) if docs else {"ingested": 0, "skipped": 0}
+    return {"records": len(videos), "ingested": out["ingested"], "skipped": out["skipped"], "failed": failed}
+
+
+def ingest_videos(
+    records: Iterable[Dict[str, Any]],
+    batch_size: int = 256,
+    checkpoint: Checkpoint | None = None,
+    progress: Callable[[Dict[str, int]], None] | None = None,
+) -> Dict[str, int]:
+    """
+    Stream records through render -> batched embed/upsert. With a checkpoint,
+    records before its position are skipped, and the position advances only
+    after a batch is stored, so a crash repeats at most one batch (and
+    unchanged documents are skipped by content hash anyway).
+    """
+    stats = {"records": 0, "ingested": 0, "skipped": 0, "failed": 0}
+    start = checkpoint.position if checkpoint else 0
+    stats["resumed_from"] = start
+    position = start
+    for batch in _batched(islice(records, start, None), batch_size):
+        out = ingest_video_batch(batch)
+        for k, v in out.items():
+            stats[k] += v
+        position += len(batch)
+        if checkpoint:
+            checkpoint.save(position, stats)
+        if progress:
+            progress(dict(stats))
+    return stats
+
@@ -1,26 +1,219 @@
-from typing import Dict
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Sequence, Set
 from fastapi import WebSocket
 from fastapi.websockets import WebSocketState
+from .bus import NotificationBus, InProcessBus, create_bus
+from .config import settings
+from .encoders import dumps_str
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"  # keep the freshest events for slow clients
+DROP_NEWEST = "drop_newest"  # keep what is already queued, reject new events
+DISCONNECT = "disconnect"    # close the socket; the client reconnects and resyncs
+
+
+def officer_topic(officer_id: str) -> str:
+    return f"officer:{officer_id}"
+
+
+class Connection:
+    """One socket with its own bounded outbound queue, drained by a dedicated sender task."""
+
+    def __init__(self, websocket: WebSocket, officer_id: str, queue_size: int, drop_policy: str):
+        self.websocket = websocket
+        self.officer_id = officer_id
+        self.drop_policy = drop_policy
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+        self.topics: Set[str] = set()
+        self.sent = 0
+        self.dropped = 0
+        self.sender: asyncio.Task | None = None
+        self.closing = False
+
+    def offer(self, text: str) -> bool:
+        """Enqueue without waiting. Must run on self.loop."""
+        if self.closing:
+            return False
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped += 1
+        if self.drop_policy == DROP_OLDEST:
+            self.queue.get_nowait()
+            self.queue.put_nowait(text)
+            return True
+        if self.drop_policy == DISCONNECT:
+            self.closing = True
+            if self.sender:
+                self.sender.cancel()
+        return False
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active: Dict[str, WebSocket] = {}
+    """
+    WebSocket fan-out. Publishing only enqueues onto per-connection queues, so
+    the request that creates an alert never waits on a socket write. Each
+    officer may hold several sockets, and sockets can join topic groups
+    (e.g. station:12, sector:15, priority:P1) for broadcasts.
+    """
+
+    def __init__(self, queue_size: int = 256, drop_policy: str = DROP_OLDEST, send_timeout_s: float = 5.0):
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.send_timeout_s = send_timeout_s
+        self.topics: Dict[str, Set[Connection]] = defaultdict(set)
+        self.connections: Set[Connection] = set()
+        self.slow_disconnects = 0
+        self.sent_total = 0
+        self.dropped_total = 0
+        self.bus: NotificationBus = InProcessBus(self.deliver)
 
-    async def connect(self, officer_id: str, websocket: WebSocket):
+    async def start_bus(self, kind: str):
+        """Swap in the configured cross-worker bus (app startup)."""
+        if kind.lower() != self.bus.name:
+            self.bus = create_bus(kind, self.deliver)
+        await self.bus.start()
+
+    async def stop_bus(self):
+        await self.bus.stop()
+
+    async def connect(self, officer_id: str, websocket: WebSocket, topics: Iterable[str] = ()) -> Connection:
         await websocket.accept()
-        self.active[officer_id] = websocket
+        conn = Connection(websocket, officer_id, self.queue_size, self.drop_policy)
+        self.connections.add(conn)
+        self.subscribe(conn, [officer_topic(officer_id), *topics])
+        conn.sender = asyncio.create_task(self._sender(conn))
+        return conn
+
+    def disconnect(self, conn: Connection):
+        conn.closing = True
+        self.connections.discard(conn)
+        for topic in list(conn.topics):
+            self._leave(conn, topic)
+        if conn.sender and not conn.sender.done() and conn.sender is not asyncio.current_task():
+            conn.sender.cancel()
+        self.sent_total += conn.sent
+        self.dropped_total += conn.dropped
+        conn.sent = conn.dropped = 0
 
-    def disconnect(self, officer_id: str):
-        self.active.pop(officer_id, None)
+    def subscribe(self, conn: Connection, topics: Iterable[str]):
+        for topic in topics:
+            topic = topic.strip()
+            if topic:
+                self.topics[topic].add(conn)
+                conn.topics.add(topic)
+
+    def unsubscribe(self, conn: Connection, topics: Iterable[str]):
+        for topic in topics:
+            if topic.strip() != officer_topic(conn.officer_id):
+                self._leave(conn, topic.strip())
+
+    def _leave(self, conn: Connection, topic: str):
+        conn.topics.discard(topic)
+        members = self.topics.get(topic)
+        if members is not None:
+            members.discard(conn)
+            if not members:
+                del self.topics[topic]
+
+    # --- publishing ---
+
+    def publish(self, topics: Iterable[str], payload: Dict[str, Any] | str):
+        """
+        Send payload to every socket in any of topics, on this worker and (via
+        the notification bus) on every other worker. Never blocks; safe to call
+        from any thread or event loop.
+        """
+        # encode once, not once per socket or per worker
+        text = payload if isinstance(payload, str) else dumps_str(payload)
+        self.bus.publish(list(topics), text)
+
+    def deliver(self, topics: Sequence[str], text: str) -> int:
+        """Queue an encoded message on this worker's sockets (each socket gets it once)."""
+        targets: Set[Connection] = set()
+        for topic in topics:
+            targets |= self.topics.get(topic, set())
+        if not targets:
+            return 0
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        for conn in targets:
+            if conn.loop is running:
+                conn.offer(text)
+            else:
+                conn.loop.call_soon_threadsafe(conn.offer, text)
+        return len(targets)
 
     async def send_to_officer(self, officer_id: str, payload: dict):
-        ws = self.active.get(officer_id)
-        if not ws:
-            return
-        if ws.application_state != WebSocketState.CONNECTED:
-            return
-        await ws.send_json(payload)
+        self.publish([officer_topic(officer_id)], payload)
+
+    async def broadcast(self, topic: str, payload: dict):
+        self.publish([topic], payload)
+
+    async def _sender(self, conn: Connection):
+        ws = conn.websocket
+        try:
+            while True:
+                text = await conn.queue.get()
+                if ws.application_state != WebSocketState.CONNECTED:
+                    break
+                try:
+                    await asyncio.wait_for(ws.send_text(text), timeout=self.send_timeout_s)
+                except asyncio.TimeoutError:
+                    self.slow_disconnects += 1
+                    logger.warning("ws send to %s timed out; closing", conn.officer_id)
+                    await self._close(ws, code=1013)
+                    break
+                conn.sent += 1
+        except asyncio.CancelledError:
+            if conn.closing and conn.drop_policy == DISCONNECT and conn in self.connections:
+                self.slow_disconnects += 1
+                await self._close(ws, code=1013)
+            raise
+        except Exception:
+            logger.debug("ws sender for %s stopped", conn.officer_id, exc_info=True)
+        finally:
+            self.disconnect(conn)
+
+    @staticmethod
+    async def _close(ws: WebSocket, code: int):
+        try:
+            await ws.close(code=code)
+        except Exception:
+            pass
+
+    # --- metrics ---
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [c.queue.qsize() for c in self.connections]
+        return {
+            "connections": len(self.connections),
+            "officers": len({c.officer_id for c in self.connections}),
+            "topics": {t: len(m) for t, m in self.topics.items() if not t.startswith("officer:")},
+            "queue_capacity": self.queue_size,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "sent": self.sent_total + sum(c.sent for c in self.connections),
+            "dropped": self.dropped_total + sum(c.dropped for c in self.connections),
+            "slow_disconnects": self.slow_disconnects,
+            "drop_policy": self.drop_policy,
+            "bus": self.bus.stats(),
+        }
 
 
-manager = ConnectionManager()
+manager = ConnectionManager(
+    queue_size=settings.WS_QUEUE_SIZE,
+    drop_policy=settings.WS_DROP_POLICY,
+    send_timeout_s=settings.WS_SEND_TIMEOUT_S,
+)
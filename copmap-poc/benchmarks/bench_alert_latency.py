@@ -0,0 +1,160 @@
+"""
+Alert creation latency under concurrent WebSocket load.
+
+Starts the API in-process on a local port with a throwaway data dir, connects
+--ws-clients officer sockets (which receive the alert notifications), then
+fires --requests POST /api/v1/alerts with --concurrency in flight and reports
+p50/p95/p99 latency. WebSocket ping round trips are sampled at the same time:
+they stay low only if nothing blocks the event loop.
+
+Run from copmap-poc/:
+    python benchmarks/bench_alert_latency.py --requests 1000 --concurrency 32 --ws-clients 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_tmp = tempfile.mkdtemp(prefix="copmap-bench-")
+os.environ.setdefault("DATA_DIR", _tmp)
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "copmap.db"))
+os.environ.setdefault("CHROMA_DIR", os.path.join(_tmp, "chroma"))
+
+
+def _pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def _report(name, values_ms):
+    print(
+        f"{name:<22} n={len(values_ms):<6} p50={_pct(values_ms, 50):8.2f}ms "
+        f"p95={_pct(values_ms, 95):8.2f}ms p99={_pct(values_ms, 99):8.2f}ms max={max(values_ms, default=0):8.2f}ms"
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _seed_officers(n: int):
+    from app.db import SessionLocal, init_db
+    from app.models import Officer
+
+    init_db()
+    db = SessionLocal()
+    try:
+        for i in range(n):
+            db.merge(Officer(
+                id=f"officer_{i}", name=f"Officer {i}", role="field",
+                last_lat=12.97 + random.uniform(-0.05, 0.05),
+                last_lon=77.59 + random.uniform(-0.05, 0.05),
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _start_server(port: int):
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    t = threading.Thread(target=server.run, daemon=True)
+    t.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _ws_client(url: str, stop: asyncio.Event, received: list, pings: list):
+    import websockets
+
+    async with websockets.connect(url) as ws:
+        async def drain():
+            async for _ in ws:
+                received.append(1)
+
+        drainer = asyncio.create_task(drain())
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await (await ws.ping())
+            pings.append((time.perf_counter() - t0) * 1000)
+            await asyncio.sleep(0.05)
+        drainer.cancel()
+
+
+async def _run(args, port: int):
+    import httpx
+
+    base = f"http://127.0.0.1:{port}"
+    stop = asyncio.Event()
+    received: list = []
+    pings: list = []
+    ws_tasks = [
+        asyncio.create_task(_ws_client(f"ws://127.0.0.1:{port}/ws/officers/officer_{i}", stop, received, pings))
+        for i in range(args.ws_clients)
+    ]
+    await asyncio.sleep(0.5)
+
+    latencies: list = []
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        async def one():
+            payload = {
+                "type": "crowd_density", "priority": random.choice(["P1", "P2", "P3"]),
+                "lat": 12.97 + random.uniform(-0.05, 0.05), "lon": 77.59 + random.uniform(-0.05, 0.05),
+                "confidence": 0.9, "metadata": {"person_count": random.randint(10, 400)},
+            }
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.post("/api/v1/alerts", json=payload)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                r.raise_for_status()
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - t0
+
+    await asyncio.sleep(0.2)
+    stop.set()
+    await asyncio.gather(*ws_tasks, return_exceptions=True)
+
+    print(f"requests={args.requests} concurrency={args.concurrency} ws_clients={args.ws_clients}")
+    print(f"throughput             {args.requests / elapsed:8.1f} alerts/s")
+    _report("POST /api/v1/alerts", latencies)
+    _report("ws ping rtt", pings)
+    print(f"ws messages received   {len(received)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--officers", type=int, default=200)
+    args = parser.parse_args()
+
+    _seed_officers(max(args.officers, args.ws_clients))
+    port = _free_port()
+    server = _start_server(port)
+    try:
+        asyncio.run(_run(args, port))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
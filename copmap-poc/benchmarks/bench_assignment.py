@@ -0,0 +1,108 @@
+"""
+Batch officer assignment: per-alert nearest loop vs the capacity-aware engine.
+
+Builds --officers random officer positions around a city centre and a burst of
+--alerts alerts concentrated in a --burst-km radius (a crowd event), then
+times each strategy and reports the load it leaves on the busiest officer,
+how many alerts stay unassigned and the priority-weighted travel distance.
+
+Run from copmap-poc/:
+    python benchmarks/bench_assignment.py --alerts 300 --officers 3000 --capacity 3
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.assignment import PRIORITY_WEIGHTS, assign_alerts  # noqa: E402
+from app.services.officer_index import KM_PER_DEG_LAT, OfficerIndex, haversine_km  # noqa: E402
+
+CENTRE = (12.97, 77.59)
+
+
+def _scenario(args):
+    rng = random.Random(args.seed)
+    spread = args.city_km / KM_PER_DEG_LAT
+    officers = {
+        f"officer_{i}": (CENTRE[0] + rng.uniform(-spread, spread), CENTRE[1] + rng.uniform(-spread, spread))
+        for i in range(args.officers)
+    }
+    burst = args.burst_km / KM_PER_DEG_LAT
+    coords = [(CENTRE[0] + rng.uniform(-burst, burst), CENTRE[1] + rng.uniform(-burst, burst)) for _ in range(args.alerts)]
+    prios = [rng.choices(["P1", "P2", "P3", "P4"], weights=[4, 3, 2, 1])[0] for _ in coords]
+    return officers, coords, prios
+
+
+def _time(fn, repeat):
+    runs, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(runs), out
+
+
+def _report(name, ms, out, officers, coords, prios):
+    assigned = [o for o in out if o]
+    cost = sum(
+        PRIORITY_WEIGHTS[p] * haversine_km(c, officers[o]) for c, p, o in zip(coords, prios, out) if o
+    )
+    p1 = [haversine_km(c, officers[o]) for c, p, o in zip(coords, prios, out) if o and p == "P1"]
+    print(
+        f"{name:<20} {ms:9.2f}ms  max_load={max(Counter(assigned).values(), default=0):<4} "
+        f"unassigned={len(out) - len(assigned):<4} weighted_km={cost:9.2f}  p1_mean_km={statistics.fmean(p1) if p1 else 0:6.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=300)
+    parser.add_argument("--officers", type=int, default=3000)
+    parser.add_argument("--capacity", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=8)
+    parser.add_argument("--max-km", type=float, default=5.0)
+    parser.add_argument("--city-km", type=float, default=15.0)
+    parser.add_argument("--burst-km", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    officers, coords, prios = _scenario(args)
+    idx = OfficerIndex()
+    for oid, (lat, lon) in officers.items():
+        idx.upsert(oid, lat, lon)
+    ids, o_lat, o_lon = idx.snapshot()
+
+    def per_alert_loop():
+        out = []
+        for lat, lon in coords:
+            hit = idx.nearest(lat, lon, args.max_km)
+            out.append(hit[0] if hit else None)
+        return out
+
+    def engine(solver):
+        return lambda: assign_alerts(
+            coords, prios, ids, o_lat, o_lon, {}, args.capacity, args.max_km,
+            candidates=args.candidates, solver=solver,
+        )
+
+    print(
+        f"alerts={args.alerts} officers={args.officers} capacity={args.capacity} "
+        f"burst_km={args.burst_km} candidates={args.candidates}"
+    )
+    for name, fn in (
+        ("nearest (per alert)", per_alert_loop),
+        ("greedy + capacity", engine("greedy")),
+        ("hungarian", engine("hungarian")),
+    ):
+        ms, out = _time(fn, args.repeat)
+        _report(name, ms, out, officers, coords, prios)
+
+
+if __name__ == "__main__":
+    main()
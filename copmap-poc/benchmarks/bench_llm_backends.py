@@ -0,0 +1,102 @@
+"""
+Patrol summary latency and throughput per LLM backend.
+
+Sends --requests summaries with --concurrency in flight through LlmService
+for each backend in --backends and reports p50/p95 latency, requests/s and
+output tokens/s (estimated at 4 chars per token). The response cache is
+off and every prompt differs, so each request really reaches the backend.
+Backends that are not configured or fail fall back to the template; the
+fallback count is printed so such a row is not mistaken for a fast model.
+
+Backends: template (no model), groq (GROQ_API_KEY), local (LLM_LOCAL_URL,
+e.g. `llama-server -m qwen2.5-0.5b-instruct-q4_k_m.gguf --port 8080`),
+transformers (LLM_TRANSFORMERS_MODEL, in-process on CPU).
+
+Run from copmap-poc/:
+    python benchmarks/bench_llm_backends.py --backends template,local --requests 20 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_tmp = tempfile.mkdtemp(prefix="copmap-bench-")
+os.environ.setdefault("DATA_DIR", _tmp)
+os.environ.setdefault("SQLITE_PATH", os.path.join(_tmp, "copmap.db"))
+
+from app.config import settings  # noqa: E402
+from app.services.llm_backends import create_backend  # noqa: E402
+from app.services.llm_service import LlmService  # noqa: E402
+
+
+def _pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def _workload(i: int):
+    rnd = random.Random(i)
+    alerts = [
+        {
+            "id": f"alert_{i}_{j}", "type": rnd.choice(["crowd_density", "traffic", "loitering"]),
+            "priority": rnd.choice(["P1", "P2", "P3", "P4"]), "status": "open",
+            "lat": 12.97 + rnd.random() / 50, "lon": 77.59 + rnd.random() / 50, "confidence": 0.9,
+        }
+        for j in range(rnd.randint(2, 12))
+    ]
+    patrol = {"id": f"patrol_bench_{i}", "officer_id": "officer_1", "location_text": f"Sector {i % 20}"}
+    context = ["Nakabandi SOP: verify vehicle papers, log plate numbers, escalate P1 alerts to control room."]
+    return patrol, alerts, f"Bench shift {i}", context
+
+
+async def _bench(mode: str, requests: int, concurrency: int):
+    backend = None if mode == "template" else create_backend(mode)
+    svc = LlmService(backend=backend, cache=None)
+    await svc.start()
+    sem = asyncio.Semaphore(concurrency)
+    latencies, chars, fallbacks = [], 0, 0
+
+    async def one(i: int):
+        nonlocal chars, fallbacks
+        async with sem:
+            t0 = time.perf_counter()
+            out = await svc.generate_patrol_summary(*_workload(i))
+            latencies.append((time.perf_counter() - t0) * 1000)
+            chars += len(out["text"])
+            fallbacks += out["generated_with"] != mode
+
+    # one untimed call loads lazy models / opens the connection
+    await svc.generate_patrol_summary(*_workload(-1))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - t0
+    await svc.stop()
+
+    print(
+        f"{mode:>12}: p50 {_pct(latencies, 50):8.1f} ms  p95 {_pct(latencies, 95):8.1f} ms  "
+        f"{requests / elapsed:7.2f} req/s  {chars / 4 / elapsed:8.1f} tok/s  fallbacks {fallbacks}/{requests}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", default="template,local")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"deadline {settings.LLM_DEADLINE_S:g}s, max_tokens {settings.LLM_MAX_TOKENS}, "
+          f"prompt budget {settings.LLM_PROMPT_TOKEN_BUDGET} tokens")
+    for mode in [m.strip() for m in args.backends.split(",") if m.strip()]:
+        asyncio.run(_bench(mode, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
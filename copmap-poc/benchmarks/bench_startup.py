@@ -0,0 +1,113 @@
+"""
+Import-time and startup measurements.
+
+1. `import app.main` wall time in a fresh interpreter (optionally the slowest
+   modules from -X importtime).
+2. Launches uvicorn on a local port with a throwaway data dir and records the
+   time until /health answers (liveness) and until /ready returns 200 (DB +
+   embedder + Chroma collection loaded by the warm-up thread).
+
+Run from copmap-poc/:
+    python benchmarks/bench_startup.py --runs 3 --importtime
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _env():
+    tmp = tempfile.mkdtemp(prefix="copmap-bench-")
+    env = dict(os.environ)
+    env.update(DATA_DIR=tmp, SQLITE_PATH=os.path.join(tmp, "copmap.db"), CHROMA_DIR=os.path.join(tmp, "chroma"))
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_time() -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=ROOT, env=_env(), check=True)
+    return time.perf_counter() - t0
+
+
+def slowest_imports(n: int = 10):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (p.strip() for p in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:n]
+
+
+def startup_times(timeout_s: float = 300.0):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=_env(),
+    )
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    live = ready = None
+    try:
+        while time.perf_counter() - t0 < timeout_s and ready is None:
+            try:
+                if live is None and httpx.get(f"{base}/health", timeout=1).status_code == 200:
+                    live = time.perf_counter() - t0
+                if live is not None and httpx.get(f"{base}/ready", timeout=1).status_code == 200:
+                    ready = time.perf_counter() - t0
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return live, ready
+
+
+def _fmt(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return "n/a"
+    return f"median={statistics.median(values):7.3f}s min={min(values):7.3f}s max={max(values):7.3f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest imports")
+    args = parser.parse_args()
+
+    imports = [import_time() for _ in range(args.runs)]
+    boots = [startup_times() for _ in range(args.runs)]
+
+    print(f"runs={args.runs}")
+    print(f"import app.main      {_fmt(imports)}")
+    print(f"time to /health 200  {_fmt([b[0] for b in boots])}")
+    print(f"time to /ready 200   {_fmt([b[1] for b in boots])}")
+
+    if args.importtime:
+        print("slowest imports (cumulative):")
+        for us, name in slowest_imports():
+            print(f"  {us / 1e6:7.3f}s  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ def main():
     con = sqlite3.connect(DB_PATH)
     try:
         con.execute("PRAGMA foreign_keys = ON;")
+        con.execute("PRAGMA journal_mode = WAL;")
 
         # --- schema (minimal PoC) ---
         con.executescript(
@@ -26,6 +27,15 @@ def main():
               last_seen_at TEXT
             );
 
+            CREATE TABLE IF NOT EXISTS officer_tracks (
+              officer_id TEXT NOT NULL,
+              ts TEXT NOT NULL,
+              lat REAL NOT NULL,
+              lon REAL NOT NULL,
+              PRIMARY KEY (officer_id, ts),
+              FOREIGN KEY (officer_id) REFERENCES officers(id)
+            ) WITHOUT ROWID;
+
             CREATE TABLE IF NOT EXISTS patrols (
               id TEXT PRIMARY KEY,
               officer_id TEXT NOT NULL,
@@ -34,8 +44,11 @@ def main():
               start_lat REAL,
               start_lon REAL,
               location_text TEXT,
+              notes TEXT,
               summary TEXT,
               risk_score REAL,
+              generated_with TEXT,
+              rag_context_json TEXT,
               FOREIGN KEY (officer_id) REFERENCES officers(id)
             );
 
@@ -67,6 +80,28 @@ def main():
               FOREIGN KEY (patrol_id) REFERENCES patrols(id),
               FOREIGN KEY (alert_id) REFERENCES alerts(id)
             );
+
+            CREATE TABLE IF NOT EXISTS jobs (
+              id TEXT PRIMARY KEY,
+              kind TEXT NOT NULL,
+              status TEXT NOT NULL DEFAULT 'queued',
+              payload_json TEXT NOT NULL DEFAULT '{}',
+              result_json TEXT,
+              error TEXT,
+              notify_topic TEXT,
+              attempts INTEGER NOT NULL DEFAULT 0,
+              created_at TEXT NOT NULL,
+              started_at TEXT,
+              finished_at TEXT,
+              lease_until TEXT
+            );
+
+            CREATE INDEX IF NOT EXISTS ix_patrols_officer_start ON patrols (officer_id, start_time);
+            CREATE INDEX IF NOT EXISTS ix_alerts_created ON alerts (created_at, id);
+            CREATE INDEX IF NOT EXISTS ix_alerts_status_created ON alerts (status, created_at, id);
+            CREATE INDEX IF NOT EXISTS ix_alerts_priority_created ON alerts (priority, created_at, id);
+            CREATE INDEX IF NOT EXISTS ix_alerts_officer_created ON alerts (assigned_officer_id, created_at, id);
+            CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at);
             """
         )
 
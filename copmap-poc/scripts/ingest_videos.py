@@ -0,0 +1,40 @@
+"""
+Bulk-ingest body-cam video metadata into the RAG store.
+
+    python scripts/ingest_videos.py --source ../sample_videos
+    python scripts/ingest_videos.py --source clips.jsonl --checkpoint data/clips.ckpt
+
+--source is a directory of *.json / *.jsonl files or one JSONL file. With
+--checkpoint, an interrupted run resumes after the last stored batch.
+"""
+import argparse
+import os
+
+from app.config import settings
+from app.services.video_ingest import Checkpoint, ingest_videos, iter_video_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", required=True)
+    parser.add_argument("--batch", type=int, default=settings.VIDEO_INGEST_BATCH)
+    parser.add_argument("--checkpoint", default="", help="progress file; resume from it if present")
+    parser.add_argument("--reset", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if args.reset and args.checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    ckpt = Checkpoint(args.checkpoint or None, args.source)
+    if ckpt.position:
+        print(f"Resuming after {ckpt.position} records")
+
+    def progress(stats):
+        print(f"  {stats['records']} records: {stats['ingested']} ingested, "
+              f"{stats['skipped']} unchanged, {stats['failed']} failed", flush=True)
+
+    stats = ingest_videos(iter_video_records(args.source), args.batch, ckpt, progress)
+    print("Video ingest complete:", stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+from sqlalchemy import inspect, text
+
+from app.config import settings
+from app.db import engine, init_db
+
+
+def main():
+    # create missing tables, add new columns/indexes, switch the file to WAL
+    init_db()
+
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+            print("journal_mode:", mode, f"(profile={settings.SQLITE_PROFILE})")
+
+    insp = inspect(engine)
+    for table in insp.get_table_names():
+        names = [ix["name"] for ix in insp.get_indexes(table)]
+        print(f"{table}: {', '.join(names) or '-'}")
+
+    print("Migration complete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -47,14 +47,14 @@ def main():
 
         sop_path = os.path.join(settings.DATA_DIR, "samples", "sop.md")
         if os.path.exists(sop_path):
+            # streamed line by line: chunked and embedded in batches, never read whole
             with open(sop_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            rag_service.ingest(
-                doc_id="sop_nakabandi_1",
-                content=content,
-                metadata={"doc_type": "SOP", "topic": "nakabandi"},
-            )
-            print("Ingested SOP into Chroma:", "sop_nakabandi_1")
+                out = rag_service.ingest_stream(
+                    doc_id="sop_nakabandi_1",
+                    pieces=f,
+                    metadata={"doc_type": "SOP", "topic": "nakabandi"},
+                )
+            print("Ingested SOP into Chroma:", "sop_nakabandi_1", out)
         else:
             print("No SOP found at:", sop_path)
 
@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+import pytest
+
+# isolate test runs from ./data (must happen before app.config is imported)
+_tmp = tempfile.mkdtemp(prefix="copmap-test-")
+os.environ["DATA_DIR"] = _tmp
+os.environ["SQLITE_PATH"] = os.path.join(_tmp, "copmap.db")
+os.environ["CHROMA_DIR"] = os.path.join(_tmp, "chroma")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _init_db():
+    from app.db import init_db
+    init_db()
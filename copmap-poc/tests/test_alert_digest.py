@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from app.services.alert_digest import build_digest, render_digest
+
+
+def _alerts(n):
+    t0 = datetime(2026, 1, 1, 18, 0)
+    return [
+        {
+            "id": f"alert_{i}", "type": "crowd_density" if i % 3 else "traffic",
+            "priority": "P1" if i % 10 == 0 else "P3", "status": "open",
+            "lat": 12.97 + (i % 4) * 0.02, "lon": 77.59, "confidence": i / n,
+            "created_at": (t0 + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def test_digest_groups_by_type_priority_and_area():
+    digest = build_digest(_alerts(400))
+    assert digest["total"] == 400
+    assert sum(g["count"] for g in digest["groups"]) == 400
+    assert len(digest["groups"]) < 20
+    assert digest["groups"][0]["priority"] == "P1"
+    assert all(len(g["exemplars"]) <= 2 for g in digest["groups"])
+
+
+def test_render_digest_respects_budget():
+    digest = build_digest(_alerts(400), cell_deg=0.001)
+    lines = render_digest(digest, max_chars=300)
+    assert sum(len(line) + 1 for line in lines) <= 300
+    assert lines[0].startswith("400 alerts")
+    assert "more groups" in lines[-1]
@@ -1,3 +1,4 @@
+import json
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -22,3 +23,89 @@ def test_create_alert():
     data = r.json()
     assert data["type"] == "crowd_density"
     assert data["priority"] == "P2"
+
+def test_create_alerts_batch_reports_per_item():
+    base = {"type": "crowd_density", "priority": "P1", "lat": 12.9716, "lon": 77.5946, "confidence": 0.8}
+    items = [base, {**base, "confidence": 1.5}, {**base, "metadata": {"camera": "cam_7"}}]
+    r = client.post("/api/v1/alerts/batch", json=items)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["created"] == 2 and data["failed"] == 1
+    assert [x["status"] for x in data["results"]] == ["created", "invalid", "created"]
+    assert data["results"][2]["alert"]["metadata"] == {"camera": "cam_7"}
+
+def test_list_alerts_cursor_pagination_and_export():
+    base = {"type": "keyset_probe", "priority": "P4", "lat": 10.0, "lon": 10.0, "confidence": 0.5}
+    client.post("/api/v1/alerts/batch", json=[base] * 5)
+
+    seen, cursor = [], None
+    while True:
+        params = {"priority": "P4", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/api/v1/alerts", params=params)
+        assert r.status_code == 200
+        seen += [a["id"] for a in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 5
+
+    r = client.get("/api/v1/alerts/export", params={"priority": "P4"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == seen
+
+    assert client.get("/api/v1/alerts", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_ready_reports_checks(monkeypatch):
+    from app.config import settings
+    from app.services.rag_service import RagService, rag_service
+
+    rag_service.warmup()
+    r = client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["checks"] == {"db": "ok", "rag": "ok"}
+
+    monkeypatch.setattr(RagService, "loaded", property(lambda self: False))
+    monkeypatch.setattr(rag_service, "state", "lazy")
+    monkeypatch.setattr(settings, "RAG_WARMUP", False)
+    r = client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["checks"]["rag"] == "lazy"
+
+    monkeypatch.setattr(rag_service, "state", "loading")
+    r = client.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["checks"]["rag"] == "loading"
+
+    monkeypatch.setattr(rag_service, "state", "error")
+    monkeypatch.setattr(rag_service, "error", "OSError: model not found")
+    r = client.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["status"] == "not_ready"
+    assert r.json()["checks"] == {"db": "ok", "rag": "error: OSError: model not found"}
+
+
+def test_batch_assignment_caps_open_alerts_per_officer():
+    from collections import Counter
+
+    from app.db import SessionLocal
+    from app.models import Officer
+
+    db = SessionLocal()
+    try:
+        for oid, lat in (("officer_syd_1", -33.8688), ("officer_syd_2", -33.8700)):
+            db.merge(Officer(id=oid, name=oid, role="field", last_lat=lat, last_lon=151.2093))
+        db.commit()
+    finally:
+        db.close()
+
+    base = {"type": "crowd_density", "priority": "P1", "lat": -33.8689, "lon": 151.2093, "confidence": 0.9}
+    first = client.post("/api/v1/alerts/batch", json=[base] * 5).json()["results"]
+    counts = Counter(r["alert"]["assigned_officer_id"] for r in first)
+    assert counts == {"officer_syd_1": 3, "officer_syd_2": 2}
+
+    # one free slot left: it goes to the P1, the P4 waits unassigned
+    second = client.post("/api/v1/alerts/batch", json=[{**base, "priority": "P4"}, base]).json()["results"]
+    assert [r["alert"]["assigned_officer_id"] for r in second] == [None, "officer_syd_2"]
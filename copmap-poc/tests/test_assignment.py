@@ -0,0 +1,56 @@
+import random
+from collections import Counter
+
+import numpy as np
+
+from app.services.assignment import assign_alerts
+
+
+def _officers(n, rng):
+    ids = [f"officer_{i}" for i in range(n)]
+    lat = np.array([12.97 + rng.uniform(-0.05, 0.05) for _ in ids])
+    lon = np.array([77.59 + rng.uniform(-0.05, 0.05) for _ in ids])
+    return ids, lat, lon
+
+
+def test_burst_is_spread_within_capacity():
+    rng = random.Random(3)
+    ids, lat, lon = _officers(40, rng)
+    coords = [(12.97 + rng.uniform(-0.002, 0.002), 77.59 + rng.uniform(-0.002, 0.002)) for _ in range(20)]
+
+    for solver in ("hungarian", "greedy"):
+        out = assign_alerts(coords, ["P1"] * 20, ids, lat, lon, {}, capacity=2, max_km=10.0, solver=solver)
+        assert None not in out
+        assert max(Counter(out).values()) <= 2
+
+
+def test_scarce_slots_go_to_high_priority_and_respect_existing_load():
+    ids, lat, lon = ["near", "busy"], np.array([12.97, 12.9701]), np.array([77.59, 77.5901])
+    coords = [(12.97, 77.59), (12.97, 77.59), (12.97, 77.59)]
+
+    out = assign_alerts(coords, ["P4", "P1", "P3"], ids, lat, lon, {"busy": 3}, capacity=3, max_km=5.0)
+    assert out[1] == "near"
+    assert out.count("busy") == 0
+    assert out.count("near") == 3
+
+    out = assign_alerts(coords, ["P4", "P1", "P3"], ids, lat, lon, {"busy": 3}, capacity=2, max_km=5.0)
+    assert out == [None, "near", "near"]
+
+
+def test_hungarian_is_never_worse_than_greedy():
+    rng = random.Random(11)
+    ids, lat, lon = _officers(300, rng)
+    coords = [(12.97 + rng.uniform(-0.03, 0.03), 77.59 + rng.uniform(-0.03, 0.03)) for _ in range(150)]
+    prios = [rng.choice(["P1", "P2", "P3", "P4"]) for _ in coords]
+
+    def cost(out):
+        from app.services.assignment import PRIORITY_WEIGHTS
+        from app.services.officer_index import haversine_km
+
+        pos = dict(zip(ids, zip(lat, lon)))
+        assert None not in out
+        return sum(PRIORITY_WEIGHTS[p] * haversine_km(c, pos[o]) for c, p, o in zip(coords, prios, out))
+
+    kw = dict(capacity=1, max_km=10.0, load_penalty_km=0.0)
+    assert cost(assign_alerts(coords, prios, ids, lat, lon, {}, solver="hungarian", **kw)) <= \
+        cost(assign_alerts(coords, prios, ids, lat, lon, {}, solver="greedy", **kw)) + 1e-9
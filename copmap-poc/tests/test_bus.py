@@ -0,0 +1,32 @@
+import asyncio
+import os
+import tempfile
+
+from app.bus import SqliteBus
+
+
+def test_sqlite_bus_reaches_other_workers_once():
+    path = os.path.join(tempfile.mkdtemp(), "bus.db")
+
+    async def run():
+        got_a, got_b = [], []
+        a = SqliteBus(lambda topics, text: got_a.append((list(topics), text)) or 1, path, poll_interval_s=0.01)
+        b = SqliteBus(lambda topics, text: got_b.append((list(topics), text)) or 1, path, poll_interval_s=0.01)
+        await a.start()
+        await b.start()
+        try:
+            a.publish(["officer:officer_1"], '{"event":"alert_created"}')
+            for _ in range(100):
+                if got_b:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+        finally:
+            await a.stop()
+            await b.stop()
+        return got_a, got_b
+
+    got_a, got_b = asyncio.run(run())
+    # publisher delivers locally right away and does not re-deliver its own row
+    assert got_a == [(["officer:officer_1"], '{"event":"alert_created"}')]
+    assert got_b == got_a
@@ -0,0 +1,20 @@
+from app.services.chunking import iter_chunks, iter_sentences
+
+
+def test_sentences_stream_across_piece_boundaries():
+    pieces = ["Barricade the jun", "ction. Call the supervisor! Log", " the time?\n\nDone"]
+    assert list(iter_sentences(pieces)) == [
+        "Barricade the junction.", "Call the supervisor!", "Log the time?", "Done",
+    ]
+
+
+def test_chunks_respect_word_budget_and_overlap():
+    text = " ".join(f"Step {i} of the nakabandi checklist is complete." for i in range(40))
+    chunks = list(iter_chunks([text], max_words=30, overlap_words=10))
+    assert len(chunks) > 1
+    assert all(len(c.split()) <= 30 for c in chunks)
+    # the last sentence of a window opens the next one
+    for prev, nxt in zip(chunks, chunks[1:]):
+        last = prev.rsplit(". ", 1)[-1]
+        assert nxt.startswith(last.rstrip(".")) or nxt.startswith(last)
+    assert "Step 39" in chunks[-1]
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from sqlalchemy import update
+
+from app.db import AsyncSessionLocal
+from app.models import Job
+from app.services.job_queue import DONE, QUEUED, JobQueue
+
+
+async def _enqueue(q, kind, payload=None):
+    async with AsyncSessionLocal() as db:
+        return (await q.enqueue(db, kind, payload or {})).id
+
+
+async def _job(job_id):
+    async with AsyncSessionLocal() as db:
+        return await db.get(Job, job_id)
+
+
+async def _wait_done(job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await _job(job_id)
+        if job.status == DONE:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_failed_job_is_retried_after_backoff_and_worker_survives_db_errors():
+    q = JobQueue(concurrency=1, poll_s=0.05, retry_backoff_s=0.3)
+    calls = []
+
+    @q.register("flaky")
+    async def flaky(payload):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RuntimeError("upstream down")
+        return {"ok": True}
+
+    @q.register("noop")
+    async def noop(payload):
+        return {}
+
+    real_finish = q._finish
+    broken = []
+
+    async def finish_once_broken(job, status, *a, **kw):
+        if job.kind == "noop" and not broken:
+            broken.append(job.id)
+            raise RuntimeError("database is locked")
+        return await real_finish(job, status, *a, **kw)
+
+    q._finish = finish_once_broken
+
+    async def run():
+        await q.start()
+        try:
+            first = await _enqueue(q, "noop")
+            job_id = await _enqueue(q, "flaky")
+            await asyncio.sleep(0.1)
+            queued = await _job(job_id)
+            assert queued.status == QUEUED and queued.lease_until is not None
+            job = await _wait_done(job_id)
+            # the worker that hit the DB error is still serving jobs
+            assert [t.done() for t in q._tasks] == [False]
+            return first, job
+        finally:
+            await q.stop()
+
+    first, job = asyncio.run(run())
+    assert broken == [first]
+    assert job.attempts == 2
+    assert calls[1] - calls[0] >= 0.25
+    assert q.retried == 1 and q.completed == 1
+
+
+def test_finish_after_lost_lease_keeps_the_new_owners_result():
+    q = JobQueue(concurrency=1, poll_s=0.05)
+
+    async def run():
+        job_id = await _enqueue(q, "slow")
+        mine = await q._claim()
+        assert mine.id == job_id
+        # our lease lapsed and another worker claimed the job and finished it
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Job).where(Job.id == job_id).values(attempts=Job.attempts + 1))
+            await db.commit()
+        theirs = await _job(job_id)
+        await q._finish(theirs, DONE, {"by": "other"}, None)
+
+        await q._finish(mine, DONE, {"by": "me"}, None)
+        return await _job(job_id)
+
+    job = asyncio.run(run())
+    assert job.status == DONE
+    assert job.result_json == '{"by": "other"}'
+    assert q.lost_leases == 1
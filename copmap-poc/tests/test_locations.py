@@ -0,0 +1,70 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.db import SessionLocal
+from app.main import app
+from app.models import Officer
+from app.services.location_service import location_tracker
+from app.services.officer_index import officer_index
+
+
+def _officer(officer_id: str, lat: float, lon: float):
+    db = SessionLocal()
+    try:
+        db.merge(Officer(id=officer_id, name=officer_id, role="field", last_lat=lat, last_lon=lon))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _stored(officer_id: str):
+    db = SessionLocal()
+    try:
+        o = db.get(Officer, officer_id)
+        return o.last_lat, o.last_lon, o.last_seen_at
+    finally:
+        db.close()
+
+
+def test_batch_pings_move_index_now_and_db_on_flush(monkeypatch):
+    _officer("officer_gps", 28.6139, 77.2090)
+    monkeypatch.setattr(location_tracker, "flush_s", 3600)  # only the shutdown flush writes
+    monkeypatch.setattr(location_tracker, "track", True)
+    monkeypatch.setattr(location_tracker, "track_min_s", 10)
+
+    pings = [
+        {"officer_id": "officer_gps", "lat": 28.6200, "lon": 77.2100, "ts": "2026-03-01T10:00:00Z"},
+        {"officer_id": "officer_gps", "lat": 28.6210, "lon": 77.2110, "ts": "2026-03-01T10:00:05Z"},
+        {"officer_id": "officer_gps", "lat": 28.6300, "lon": 77.2200, "ts": "2026-03-01T10:00:20Z"},
+        {"officer_id": "officer_gps", "lat": 28.0000, "lon": 77.0000, "ts": "2026-03-01T09:59:00Z"},
+        {"officer_id": "officer_nobody", "lat": 28.6, "lon": 77.2},
+    ]
+    with TestClient(app) as client:
+        r = client.post("/api/v1/officers/locations", json=pings)
+        assert r.status_code == 202
+        assert r.json() == {"accepted": 3, "stale": 1, "unknown": 1}
+        assert officer_index.position("officer_gps") == (28.6300, 77.2200)
+        assert _stored("officer_gps")[:2] == (28.6139, 77.2090)
+
+        assert client.post("/api/v1/officers/locations", json=[{"officer_id": "x", "lat": 91, "lon": 0}]).status_code == 422
+
+    # shutdown flushed one coalesced row and the thinned track (10:00:05 is within 10s of 10:00:00)
+    lat, lon, seen = _stored("officer_gps")
+    assert (lat, lon, seen.isoformat()) == (28.6300, 77.2200, "2026-03-01T10:00:20")
+    track = TestClient(app).get("/api/v1/officers/officer_gps/track").json()
+    assert [(p["ts"], p["lat"]) for p in track] == [("2026-03-01T10:00:00", 28.62), ("2026-03-01T10:00:20", 28.63)]
+
+
+def test_websocket_location_message_updates_position():
+    _officer("officer_gps_ws", 19.0760, 72.8777)
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/officers/officer_gps_ws") as ws:
+            ws.send_json({"type": "location", "lat": 19.0800, "lon": 72.8800})
+            ws.send_json({"type": "location", "lat": 200, "lon": 72.8800})  # ignored
+            for _ in range(100):
+                if officer_index.position("officer_gps_ws") == (19.0800, 72.8800):
+                    break
+                time.sleep(0.01)
+            assert officer_index.position("officer_gps_ws") == (19.0800, 72.8800)
+    assert _stored("officer_gps_ws")[:2] == (19.0800, 72.8800)
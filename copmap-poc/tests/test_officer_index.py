@@ -0,0 +1,82 @@
+import random
+
+from app.services.officer_index import OfficerIndex, haversine_km
+
+
+def _brute_force(points, lat, lon, radius_km):
+    hits = [(oid, haversine_km((lat, lon), p)) for oid, p in points.items()]
+    return sorted([h for h in hits if h[1] <= radius_km], key=lambda h: h[1])
+
+
+def test_radius_and_knn_match_brute_force():
+    rng = random.Random(7)
+    idx = OfficerIndex(cell_deg=0.05)
+    points = {}
+    for i in range(500):
+        p = (12.9 + rng.uniform(-0.5, 0.5), 77.6 + rng.uniform(-0.5, 0.5))
+        points[f"officer_{i}"] = p
+        idx.upsert(f"officer_{i}", *p)
+
+    for _ in range(20):
+        lat, lon = 12.9 + rng.uniform(-0.6, 0.6), 77.6 + rng.uniform(-0.6, 0.6)
+        expected = _brute_force(points, lat, lon, 7.5)
+        assert [h[0] for h in idx.within_radius(lat, lon, 7.5)] == [h[0] for h in expected]
+        assert [h[0] for h in idx.k_nearest(lat, lon, 5)] == [h[0] for h in _brute_force(points, lat, lon, 1e9)[:5]]
+
+
+def test_nearest_tracks_moves_and_removals():
+    idx = OfficerIndex()
+    idx.upsert("officer_1", 12.9716, 77.5946)
+    idx.upsert("officer_2", 12.9750, 77.6000)
+
+    assert idx.nearest(12.9716, 77.5946, max_km=5.0)[0] == "officer_1"
+
+    idx.upsert("officer_1", 13.5, 78.5)  # moved far away
+    assert idx.nearest(12.9716, 77.5946, max_km=5.0)[0] == "officer_2"
+
+    idx.remove("officer_2")
+    assert idx.nearest(12.9716, 77.5946, max_km=5.0) is None
+
+
+def test_antimeridian_neighbours():
+    idx = OfficerIndex()
+    idx.upsert("east", 0.0, 179.99)
+    assert idx.nearest(0.0, -179.99, max_km=5.0)[0] == "east"
+
+
+def test_reload_into_empty_index_invalidates_snapshot():
+    class EmptyDb:
+        def query(self, *cols):
+            return self
+
+        def all(self):
+            return []
+
+    idx = OfficerIndex()
+    idx.upsert("ghost", 12.0, 77.0)
+    assert idx.snapshot()[0] == ["ghost"]
+    idx.reload(EmptyDb())
+    assert idx.snapshot()[0] == []
+
+
+def test_orm_changes_reach_index_only_on_commit():
+    from app.db import SessionLocal
+    from app.models import Officer
+    from app.services.officer_index import officer_index
+
+    with SessionLocal() as db:
+        db.add(Officer(id="officer_rollback", name="R", last_lat=11.0, last_lon=76.0))
+        db.flush()
+        assert officer_index.position("officer_rollback") is None
+        db.rollback()
+    assert officer_index.position("officer_rollback") is None
+
+    with SessionLocal() as db:
+        db.add(Officer(id="officer_commit", name="C", last_lat=11.0, last_lon=76.0))
+        db.commit()
+        assert officer_index.position("officer_commit") == (11.0, 76.0)
+        db.delete(db.get(Officer, "officer_commit"))
+        db.flush()
+        assert officer_index.position("officer_commit") == (11.0, 76.0)
+        db.commit()
+    assert officer_index.position("officer_commit") is None
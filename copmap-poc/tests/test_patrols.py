@@ -0,0 +1,76 @@
+import time
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def _wait_for_job(c, job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = c.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _end_patrol(c, location_text="Sector 15", notes="Quiet shift"):
+    patrol_id = c.post("/api/v1/patrols/start", json={"officer_id": "officer_1", "location_text": location_text}).json()["id"]
+    r = c.post(f"/api/v1/patrols/{patrol_id}/end", json={"notes": notes})
+    assert r.status_code == 202
+    return patrol_id, r.json()
+
+
+def test_patrol_end_generates_summary():
+    with TestClient(app) as c:
+        with c.websocket_connect("/ws/officers/officer_1") as ws:
+            patrol_id, body = _end_patrol(c)
+            assert body["end_time"] is not None
+            assert body["job"]["status"] == "queued"
+
+            msg = ws.receive_json()
+            assert msg["event"] == "job_update"
+            assert msg["job"]["status"] == "done"
+            assert msg["job"]["result"]["patrol_id"] == patrol_id
+
+        job = _wait_for_job(c, body["job"]["id"])
+        assert "Executive Summary" in job["result"]["summary"]
+
+
+def test_patrol_summary_reads_stored_rag_context(monkeypatch):
+    from app.services.rag_service import rag_service
+
+    client.post("/api/v1/documents/ingest", json={"doc_id": "sop_sector_15", "content": "Sector 15 night checks."})
+    with TestClient(app) as c:
+        patrol_id, body = _end_patrol(c)
+        _wait_for_job(c, body["job"]["id"])
+
+    def no_query(*a, **kw):
+        raise AssertionError("summary read must not query RAG")
+
+    monkeypatch.setattr(rag_service, "query", no_query)
+    monkeypatch.setattr(rag_service, "aquery", no_query)
+    r = client.get(f"/api/v1/patrols/{patrol_id}/summary")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["generated_with"] == "template"
+    assert len(body["rag_context"]) == len(body["rag_context_docs"]) > 0
+    assert all("doc_id" in c for c in body["rag_context"])
+
+    monkeypatch.undo()
+    r = client.get(f"/api/v1/patrols/{patrol_id}/summary", params={"refresh": "true"})
+    assert r.status_code == 200
+    assert "Officer Notes: Quiet shift" in r.json()["summary"]
+
+
+def test_summary_job_queued_before_startup_is_picked_up():
+    # no lifespan: the job is only written to the DB, as if the process died right after
+    patrol_id, body = _end_patrol(client, notes="Queued while down")
+    assert client.get(f"/api/v1/jobs/{body['job']['id']}").json()["status"] == "queued"
+
+    with TestClient(app) as c:
+        job = _wait_for_job(c, body["job"]["id"])
+    assert job["status"] == "done"
+    assert "Queued while down" in job["result"]["summary"]
@@ -19,3 +19,243 @@ def test_rag_ingest_and_query():
     out = r2.json()
     assert out["query"]
     assert isinstance(out["results"], list)
+
+
+def test_rag_batch_ingest_skips_unchanged_documents():
+    docs = {"documents": [
+        {"doc_id": f"doc_batch_{i}", "doc_type": "log", "content": f"Shift log entry {i}: checkpoint cleared."}
+        for i in range(3)
+    ]}
+    r1 = client.post("/api/v1/documents/ingest/batch", json=docs)
+    assert r1.status_code == 200
+    assert r1.json()["ingested"] == 3
+
+    docs["documents"][0]["content"] = "Shift log entry 0: checkpoint flagged for review."
+    r2 = client.post("/api/v1/documents/ingest/batch", json=docs)
+    assert r2.json() == {"status": "ingested", "ingested": 1, "skipped": 2}
+
+
+def test_embedding_executor_merges_concurrent_requests():
+    import asyncio
+    from app.services.embedding_executor import EmbeddingExecutor
+
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    async def run():
+        ex = EmbeddingExecutor(encode, window_ms=20)
+        try:
+            return await asyncio.gather(*(ex.embed([f"q{i}" * (i + 1)]) for i in range(8)))
+        finally:
+            ex.shutdown()
+
+    out = asyncio.run(run())
+    assert len(calls) == 1 and len(calls[0]) == 8
+    assert out == [[[float(2 * (i + 1))]] for i in range(8)]
+
+
+def test_rag_reingest_reuses_unchanged_chunks(monkeypatch):
+    from app.config import settings
+    from app.services.rag_service import rag_service
+
+    sentences = [f"Checkpoint {i} must be staffed by two officers during the night shift." for i in range(60)]
+    first = rag_service.ingest_stream("doc_chunked", iter([" ".join(sentences)]), {"doc_type": "SOP"})
+    assert first["chunks"] > 1
+    assert first["embedded"] == first["chunks"]
+
+    # edit one sentence near the end: only the chunks containing it are re-embedded
+    sentences[-2] = "Checkpoint 58 is closed until further notice."
+    second = rag_service.ingest_stream("doc_chunked", iter([" ".join(sentences)]), {"doc_type": "SOP"})
+    assert 0 < second["embedded"] < second["chunks"]
+    assert second["deleted"] == second["embedded"]
+
+    stored = rag_service.collection.get(where={"doc_id": "doc_chunked"})
+    assert len(stored["ids"]) == second["chunks"]
+    # split on sentence boundaries, not mid-sentence
+    assert all(doc.endswith(".") for doc in stored["documents"])
+
+    hits = rag_service.query("Which checkpoint is closed?", k=settings.RAG_QUERY_FANOUT)
+    assert len({h["doc_id"] for h in hits}) == len(hits)
+
+    # same text, new metadata: BM25 rows get the metadata without being re-tokenized
+    def no_upsert(records):
+        assert not list(records), "unchanged text must not be re-indexed"
+
+    monkeypatch.setattr(rag_service.lexical, "upsert", no_upsert)
+    third = rag_service.ingest_stream("doc_chunked", iter([" ".join(sentences)]), {"doc_type": "SOP", "revision": 2})
+    assert third["embedded"] == 0 and third["updated"] == third["chunks"]
+    hits = rag_service.lexical.search("checkpoint closed", 3, where={"revision": 2})
+    assert hits and all(h["metadata"]["revision"] == 2 for h in hits)
+
+
+def test_rag_lexical_mode_finds_exact_ids_without_embedding():
+    from app.services.rag_service import rag_service
+
+    docs = {"documents": [
+        {"doc_id": "log_off_001", "doc_type": "log", "content": "Officer OFF_001 cleared the checkpoint on MG Road."},
+        {"doc_id": "log_off_002", "doc_type": "log", "content": "Officer OFF_002 escorted the convoy to Brigade Road."},
+    ]}
+    assert client.post("/api/v1/documents/ingest/batch", json=docs).status_code == 200
+
+    calls = rag_service.executor.calls
+    r = client.post("/api/v1/rag/query", json={"query": "Officer OFF_001 activities", "k": 1, "mode": "lexical"})
+    assert r.status_code == 200
+    assert [h["doc_id"] for h in r.json()["results"]] == ["log_off_001"]
+    assert rag_service.executor.calls == calls
+
+    hybrid = client.post("/api/v1/rag/query", json={"query": "OFF_002 convoy", "k": 2, "mode": "hybrid"}).json()
+    assert hybrid["results"][0]["doc_id"] == "log_off_002"
+    assert "score" in hybrid["results"][0]
+
+
+def test_rag_query_cache_hits_until_ingest():
+    from app.services.rag_service import rag_service
+
+    q = {"query": "Who watches the north gate?", "k": 2, "mode": "vector"}
+    client.post("/api/v1/documents/ingest", json={"doc_id": "gate_1", "content": "Officer B watches the north gate."})
+
+    before = rag_service.query_cache.stats()
+    first = client.post("/api/v1/rag/query", json=q).json()
+    again = client.post("/api/v1/rag/query", json=q).json()
+    after = rag_service.query_cache.stats()
+    assert first == again
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
+
+    client.post("/api/v1/documents/ingest", json={"doc_id": "gate_1", "content": "Officer C watches the north gate."})
+    client.post("/api/v1/rag/query", json=q)
+    assert rag_service.query_cache.stats()["misses"] == after["misses"] + 1
+
+
+def test_upload_streams_large_document_with_progress():
+    import json as _json
+
+    text = "".join(f"Log line {i}: vehicle checked at barricade {i % 7}. " for i in range(3000))
+
+    r = client.post(
+        "/api/v1/documents/upload",
+        params={"doc_id": "incident_log_big", "doc_type": "log", "progress": "true"},
+        content=text.encode(),
+        headers={"content-type": "text/plain"},
+    )
+    assert r.status_code == 200
+    events = [_json.loads(line) for line in r.text.splitlines()]
+    assert events[-1]["event"] == "done"
+    assert events[-1]["bytes"] == len(text.encode())
+    assert [e["event"] for e in events[:-1]] == ["progress"] * (len(events) - 1)
+    assert events[-1]["chunks"] == events[-2]["chunks"] > 1
+
+    r = client.post(
+        "/api/v1/documents/upload",
+        params={"doc_id": "incident_log_small"},
+        files={"file": ("log.txt", b"Barricade 3 reopened at dawn.", "text/plain")},
+    )
+    assert r.json()["chunks"] == 1 and r.json()["embedded"] == 1
+
+
+def test_upload_cap_applies_to_chunked_bodies(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 4096)
+    boundary = "copmapboundary"
+    head = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"log.txt\"\r\n"
+        "Content-Type: text/plain\r\n\r\n"
+    ).encode()
+
+    def multipart():
+        # a generator body goes out with Transfer-Encoding: chunked and no content-length
+        yield head
+        for _ in range(10):
+            yield b"Barricade checked. " * 50
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    r = client.post(
+        "/api/v1/documents/upload",
+        params={"doc_id": "too_big_multipart"},
+        content=multipart(),
+        headers={"content-type": f"multipart/form-data; boundary={boundary}"},
+    )
+    assert r.status_code == 413
+
+    r = client.post(
+        "/api/v1/documents/upload",
+        params={"doc_id": "too_big_raw"},
+        content=(b"Barricade checked. " * 50 for _ in range(10)),
+        headers={"content-type": "text/plain"},
+    )
+    assert r.status_code == 413
+
+
+def test_rag_filters_resolve_through_metadata_index(monkeypatch):
+    from app.config import settings
+    from app.services.rag_service import rag_service
+
+    docs = {"documents": [
+        {"doc_id": "mi_1", "doc_type": "note", "content": "Crowd gathered near the stadium gate.",
+         "metadata": {"officer_id": "OFF_901", "tags": ["crowd", "stadium"], "shift": 1}},
+        {"doc_id": "mi_2", "doc_type": "note", "content": "Crowd dispersed after the match ended.",
+         "metadata": {"officer_id": "OFF_902", "tags": ["crowd"], "shift": 2}},
+        {"doc_id": "mi_3", "doc_type": "note", "content": "Quiet night at the stadium car park.",
+         "metadata": {"officer_id": "OFF_901", "tags": ["stadium"], "shift": 3}},
+    ]}
+    assert client.post("/api/v1/documents/ingest/batch", json=docs).status_code == 200
+
+    assert rag_service.metadata.resolve({"tags": {"$contains": "crowd"}}) == {"mi_1", "mi_2"}
+    assert rag_service.metadata.resolve({"$and": [{"officer_id": "OFF_901"}, {"shift": {"$gte": 2}}]}) == {"mi_3"}
+    assert rag_service.metadata.resolve({"officer_id": {"$regex": "x"}}) is None
+    assert rag_service.metadata.resolve({"doc_id": {"$in": ["mi_2", "mi_9"]}}) == {"mi_2"}
+    assert rag_service.metadata.resolve({"chunk_index": 0}) is None
+
+    def ids(filters, mode):
+        q = {"query": "crowd at the stadium", "k": 5, "mode": mode, "filters": filters}
+        return sorted(h["doc_id"] for h in client.post("/api/v1/rag/query", json=q).json()["results"])
+
+    for mode in ("vector", "lexical", "hybrid"):
+        assert ids({"tags": {"$contains": "stadium"}}, mode) == ["mi_1", "mi_3"]
+        assert ids({"officer_id": "OFF_902"}, mode) == ["mi_2"]
+        assert ids({"officer_id": "OFF_000"}, mode) == []
+        assert ids({"doc_id": "mi_3"}, mode) == ["mi_3"]
+        assert ids({"$and": [{"chunk_index": 0}, {"officer_id": "OFF_902"}]}, mode) == ["mi_2"]
+
+    # large candidate sets go through Chroma's HNSW with a doc_id filter instead
+    monkeypatch.setattr(settings, "RAG_PREFILTER_EXACT_DOCS", 0)
+    assert ids({"tags": {"$contains": "stadium"}, "shift": {"$lt": 3}}, "vector") == ["mi_1"]
+
+
+def test_rag_metadata_backfill_survives_ingest_before_first_filter(monkeypatch):
+    from app.services.rag_service import rag_service
+
+    meta = {"officer_id": "OFF_951", "tags": ["traffic", "bus"]}
+    rag_service.ingest("bf_old", "Vehicle parked across the bus stop.", meta)
+    # written before the metadata index existed: only Chroma knows it
+    db = rag_service.metadata._conn()
+    for table in ("meta_docs", "meta_values", "meta_multi"):
+        db.execute(f"DELETE FROM {table} WHERE doc_id = 'bf_old'")
+    db.execute("DELETE FROM meta_state")
+    monkeypatch.setattr(rag_service, "_metadata_backfilled", False)
+
+    # an ingest after the upgrade, before any filtered query
+    rag_service.ingest("bf_new", "Vehicle towed from the bus stop.", {"officer_id": "OFF_951"})
+
+    hits = rag_service.query("vehicle bus stop", k=5, where={"officer_id": "OFF_951"}, mode="lexical")
+    assert sorted(h["doc_id"] for h in hits) == ["bf_new", "bf_old"]
+    # Chroma holds the joined "traffic,bus"; the backfill splits it back into a list
+    assert rag_service.metadata.resolve({"tags": {"$contains": "bus"}}) == {"bf_old"}
+    assert rag_service.metadata.get_state("backfilled") == "1"
+
+
+def test_lexical_filters_support_ranges_and_reject_unknown_operators():
+    from app.services.lexical_index import matches_where
+
+    meta = {"shift": 2, "tags": "crowd,stadium"}
+    assert matches_where(meta, {"shift": {"$gte": 2, "$lt": 3}})
+    assert not matches_where(meta, {"shift": {"$gt": 2}})
+    assert matches_where(meta, {"tags": {"$contains": "stadium"}})
+    assert not matches_where({}, {"shift": {"$lte": 5}})
+
+    q = {"query": "crowd", "k": 3, "mode": "lexical", "filters": {"officer_id": {"$regex": "OFF_.*"}}}
+    r = client.post("/api/v1/rag/query", json=q)
+    assert r.status_code == 400
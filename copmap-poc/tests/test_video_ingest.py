@@ -0,0 +1,50 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.video_ingest import Checkpoint, ingest_videos, iter_video_records, video_metadata
+
+client = TestClient(app)
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "..", "..", "sample_videos")
+
+
+def _clip(i, **extra):
+    return {
+        "video_id": f"clip_{i:04d}", "video_name": f"Clip {i}", "description": f"Patrol clip number {i}.",
+        "timestamp": "2026-02-12 14:30:00", "location": "Main St", "officer_id": f"OFF_{i % 3:03d}",
+        "duration_seconds": 60 + i, "tags": ["traffic"] if i % 2 else ["night patrol"], **extra,
+    }
+
+
+def test_video_ingest_endpoint_streams_ndjson_and_sets_filterable_metadata():
+    body = "\n".join(json.dumps(_clip(i)) for i in range(5)) + "\nnot json\n"
+    r = client.post("/api/v1/documents/ingest/videos", content=body, headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200
+    assert r.json() == {"status": "ingested", "records": 6, "ingested": 5, "skipped": 0, "failed": 1}
+
+    q = {"query": "patrol clip", "k": 10, "mode": "lexical", "filters": {"tags": {"$contains": "night patrol"}}}
+    hits = client.post("/api/v1/rag/query", json=q).json()["results"]
+    assert sorted(h["doc_id"] for h in hits) == ["clip_0000", "clip_0002", "clip_0004"]
+    assert hits[0]["metadata"]["duration_seconds"] >= 60
+    # naive timestamps are read as UTC whatever the server's timezone
+    assert hits[0]["metadata"]["recorded_at"] == 1770906600
+    assert video_metadata(_clip(1, timestamp="2026-02-12T20:00:00+05:30"))["recorded_at"] == 1770906600
+
+
+def test_video_ingest_resumes_from_checkpoint(tmp_path):
+    src = tmp_path / "clips.jsonl"
+    src.write_text("\n".join(json.dumps(_clip(100 + i)) for i in range(7)))
+    ckpt_path = str(tmp_path / "clips.ckpt")
+
+    Checkpoint(ckpt_path, str(src)).save(4, {})  # a previous run stored 4 records, then died
+    stats = ingest_videos(iter_video_records(str(src)), batch_size=2, checkpoint=Checkpoint(ckpt_path, str(src)))
+    assert stats["resumed_from"] == 4 and stats["records"] == 3
+    assert Checkpoint(ckpt_path, str(src)).position == 7
+
+
+def test_sample_videos_directory_is_readable():
+    records = list(iter_video_records(SAMPLES))
+    assert {r["video_id"] for r in records} >= {"video_001", "video_004"}
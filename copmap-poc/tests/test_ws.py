@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from app.db import SessionLocal
+from app.main import app
+from app.models import Officer
+from app.ws import ConnectionManager
+
+client = TestClient(app)
+
+
+def _officer(officer_id: str, lat: float, lon: float):
+    db = SessionLocal()
+    try:
+        db.merge(Officer(id=officer_id, name=officer_id, role="field", last_lat=lat, last_lon=lon))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_alert_reaches_every_socket_of_officer_and_topic_group():
+    _officer("officer_ws", 40.7128, -74.0060)
+    alert = {"type": "crowd_density", "priority": "P1", "lat": 40.7130, "lon": -74.0062,
+             "confidence": 0.9, "metadata": {"sector": "15"}}
+
+    with client.websocket_connect("/ws/officers/officer_ws") as a, \
+            client.websocket_connect("/ws/officers/officer_ws") as b, \
+            client.websocket_connect("/ws/officers/supervisor_1?topics=sector:15") as sup:
+        r = client.post("/api/v1/alerts", json=alert)
+        assert r.json()["assigned_officer_id"] == "officer_ws"
+        for ws in (a, b, sup):
+            msg = ws.receive_json()
+            assert msg["event"] == "alert_created"
+            assert msg["alert"]["id"] == r.json()["id"]
+
+    assert client.get("/metrics/ws").json()["connections"] == 0
+
+
+def test_drop_oldest_keeps_queue_bounded():
+    import asyncio
+
+    class _SlowSocket:
+        async def accept(self):
+            pass
+
+    async def run():
+        mgr = ConnectionManager(queue_size=2)
+        conn = await mgr.connect("officer_x", _SlowSocket())
+        conn.sender.cancel()  # nothing drains the queue
+        for i in range(5):
+            mgr.publish(["officer:officer_x"], {"n": i})
+        return [conn.queue.get_nowait() for _ in range(conn.queue.qsize())], mgr.stats()
+
+    queued, stats = asyncio.run(run())
+    assert queued == ['{"n":3}', '{"n":4}']
+    assert stats["dropped"] == 3